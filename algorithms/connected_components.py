@@ -1,50 +1,72 @@
-# Originally Sourced from GeeksforGeeks
+from collections import deque
 
-def DFSUtil(graph, temp, v, visited):
+import numpy as np
 
-    # Mark the current vertex as visited
-    visited[v] = True
+from structures.sparse_topology import SparseTopology
 
-    # Store the vertex to list
-    temp.append(v)
+# Components are iterative, long chains of nodes do not hit the recursion limit
 
-    # Repeat for all vertices adjacent
-    # to this vertex v
-    for i,w in enumerate(graph[v]):
-        if w > 0:
-            if visited[i] == False:
+def find(parent, v):
+    # Root of v, halving the path on the way
+    while parent[v] != v:
+        parent[v] = parent[parent[v]]
+        v = parent[v]
+    return v
 
-                # Update the list
-                temp = DFSUtil(graph, temp, i, visited)
-    return temp
+def unionFindComponents(V, edges):
+    '''
+    Components of V vertices joined by (u, v) edges, as sorted lists
+    ordered by their lowest vertex.
+    '''
+    parent = list(range(V))
+    for u, v in edges:
+        root_u, root_v = find(parent, u), find(parent, v)
+        if root_u == root_v: continue
+        # Lower root wins, so every root is the lowest vertex of its component
+        if root_u < root_v: parent[root_v] = root_u
+        else: parent[root_u] = root_v
+    cc = {}
+    for v in range(V):
+        cc.setdefault(find(parent, v), []).append(v)
+    return list(cc.values())
 
 # Method to retrieve connected components
-# in an undirected graph
+# in an undirected graph (adjacency matrix)
 def connectedComponents(graph):
-    visited = []
+    adj = np.asarray(graph)
+    us, vs = np.nonzero(np.triu(adj > 0, 1) | np.triu(adj.T > 0, 1))
+    return unionFindComponents(len(adj), zip(us.tolist(), vs.tolist()))
+
+# Breadth first search over adjacency lists [[(neighbor, weight), ...], ...]
+def adjacencyComponents(adj):
+    visited = [False] * len(adj)
     cc = []
-    for i in range(len(graph)):
-        visited.append(False)
-    for v in range(len(graph)):
-        if visited[v] == False:
-            temp = []
-            cc.append(DFSUtil(graph, temp, v, visited))
+    for v in range(len(adj)):
+        if visited[v]: continue
+        visited[v] = True
+        temp = [v]
+        queue = deque([v])
+        while queue:
+            u = queue.popleft()
+            for i,_ in adj[u]:
+                if not visited[i]:
+                    visited[i] = True
+                    temp.append(i)
+                    queue.append(i)
+        cc.append(sorted(temp))
     return cc
 
+# Same as connectedComponents, but walks the adjacency lists of a SparseTopology
+def sparseConnectedComponents(topology):
+    return adjacencyComponents(topology.adjacency_lists())
+
 def subGraphs(graph):
-    comps = connectedComponents(graph)
+    if isinstance(graph, SparseTopology):
+        # Sub graphs are SparseTopology too
+        return [({i:n for i,n in enumerate(c)}, graph.subgraph(c)) for c in sparseConnectedComponents(graph)]
+    adj = np.asarray(graph)
     sub_graphs = []
-    for c in comps:
-        component = sorted(c)
+    for component in connectedComponents(adj):
         map = {i:n for i,n in enumerate(component)}
-        sub_g = []
-        for u in range(len(component)):
-            row = []
-            for v in range(len(component)):
-                row.append(None)
-            sub_g.append(row)
-        for u_new,u in enumerate(component):
-            for v_new,v in enumerate(component):
-                sub_g[u_new][v_new] = graph[u][v]
-        sub_graphs.append((map,sub_g))
+        sub_graphs.append((map, adj[np.ix_(component, component)]))
     return sub_graphs
@@ -0,0 +1,116 @@
+import numpy as np
+
+from algorithms.shortest_paths import INF, adjacencyLists, isUnitWeight, distancesFrom, allPairsShortestPaths
+from structures.sparse_topology import SparseTopology
+
+# All pairs shortest paths kept up to date as edges change
+# ... insertions (and weight decreases) relax every pair through the new edge, O(V^2)
+# ... deletions (and weight increases) only recompute the sources
+# ... that had the edge on one of their shortest paths
+
+
+def format_weights(weights):
+    # Adjacency (0 = no edge) to the INF padded format used for shortest paths
+    formatted = np.where(weights > 0, weights, INF)
+    np.fill_diagonal(formatted, 0)
+    return formatted
+
+def net_changes(changes):
+    # Net (u, v, old_weight, new_weight) per undirected edge, u < v, for trackers
+    # ... in case a batch touches an edge more than once, edges that end as they began are left out
+    net = {}
+    for (u, v, old, new) in changes:
+        if u == v: continue
+        key = (min(u, v), max(u, v))
+        net[key] = (net[key][0] if key in net else old, new)
+    return [(u, v, old, new) for (u, v),(old, new) in net.items() if old != new]
+
+
+class DynamicAPSP():
+    def __init__(self, adj_matrix):
+        # The distance matrix is dense either way
+        self.weights = adj_matrix.to_dense() if isinstance(adj_matrix, SparseTopology) else np.array(adj_matrix)
+        self.dist = allPairsShortestPaths(format_weights(self.weights))
+        # Indices freed by a retired node, not part of any component
+        self.retired = set()
+        self._components = None
+
+    def edges_changed(self, changes):
+        '''
+        Apply a batch of (u, v, old_weight, new_weight) edge changes.
+        A weight of 0 means there is no edge.
+        '''
+        changes = net_changes(changes)
+        if not len(changes): return
+        self._components = None
+
+        # Removals first, judged against the distances before this batch
+        removed = [(u, v, old) for (u, v, old, new) in changes if old and (not new or new > old)]
+        if len(removed):
+            affected = np.zeros(len(self.dist), dtype=bool)
+            for u, v, old in removed:
+                # Sources for which (u,v) lies on some shortest path
+                affected |= self.dist[:, u] + old == self.dist[:, v]
+                affected |= self.dist[:, v] + old == self.dist[:, u]
+                self.weights[u][v] = self.weights[v][u] = 0
+            self._recompute_sources(np.flatnonzero(affected))
+
+        # Then insertions, including the new weight of updated edges
+        for (u, v, old, new) in changes:
+            if not new: continue
+            self.weights[u][v] = self.weights[v][u] = new
+            self.insert_edge(u, v, new)
+
+    def node_added(self, index):
+        # A retired index being reused, it has no links yet
+        if index < len(self.dist):
+            assert(index in self.retired)
+            self.retired.discard(index)
+            self._components = None
+            return
+        # New vertex at the end, not connected to anything yet
+        assert(index == len(self.dist))
+        self.weights = np.pad(self.weights, ((0,1),(0,1)))
+        self.dist = np.pad(self.dist, ((0,1),(0,1)), constant_values=INF)
+        self.dist[index][index] = 0
+        self._components = None
+
+    def node_retired(self, index):
+        # Its links were removed first, so it is alone in its component
+        self.retired.add(index)
+        self._components = None
+
+    def insert_edge(self, u, v, w):
+        # Any path that improves must use the new edge, in one direction or the other
+        via_uv = self.dist[:, u, None] + w + self.dist[None, v, :]
+        via_vu = self.dist[:, v, None] + w + self.dist[None, u, :]
+        self.dist = np.minimum(self.dist, np.minimum(via_uv, via_vu))
+
+    def _recompute_sources(self, sources):
+        if not len(sources): return
+        adj = adjacencyLists(format_weights(self.weights))
+        method = "bfs" if isUnitWeight(adj) else "dijkstra"
+        rows = np.array(distancesFrom(adj, sources, method), dtype=self.dist.dtype)
+        # Undirected, so the columns of the recomputed sources change too
+        self.dist[sources, :] = rows
+        self.dist[:, sources] = rows.T
+
+    def components(self):
+        '''
+        List of (component, center, radius, diameter), one per connected
+        component ordered by lowest member, in the indices of the full graph.
+        '''
+        if self._components is not None: return self._components
+        reachable = self.dist < INF
+        # The lowest reachable index identifies the component
+        labels = np.argmax(reachable, axis=1)
+        eccentricity = np.where(reachable, self.dist, -1).max(axis=1)
+        self._components = []
+        for label in np.unique(labels):
+            if label in self.retired: continue
+            members = np.flatnonzero(labels == label)
+            ecc = eccentricity[members]
+            radius = ecc.min()
+            center = members[ecc == radius].tolist()
+            self._components.append((members.tolist(), center, radius, ecc.max()))
+        return self._components
@@ -0,0 +1,146 @@
+import itertools
+from collections import deque
+
+import numpy as np
+
+from algorithms.connected_components import unionFindComponents
+from algorithms.dynamic_apsp import net_changes
+from structures.sparse_topology import SparseTopology
+
+# Connected components kept up to date as edges change
+# ... insertions merge the smaller component into the larger, O(smaller)
+# ... a deletion searches from both ends at once and stops when the searches
+# ... meet (still connected) or one runs out (it found the part that split off)
+
+
+class DynamicConnectivity():
+    def __init__(self, adj_matrix):
+        V = len(adj_matrix)
+        if isinstance(adj_matrix, SparseTopology):
+            self.adj = [set(v for v,_ in adj_matrix.neighbors(u) if v != u) for u in range(V)]
+        else:
+            adj = np.asarray(adj_matrix)
+            self.adj = [set(np.flatnonzero(adj[u]).tolist()) - {u} for u in range(V)]
+        self.ids = itertools.count()
+        # index -> component id and component id -> set of indices
+        self.label = [None] * V
+        self.members = {}
+        edges = [(u, v) for u in range(V) for v in self.adj[u] if u < v]
+        for component in unionFindComponents(V, edges):
+            self._new_component(component)
+        # ("merge", kept_id, absorbed_id) and ("split", id, new_id), in order
+        self.events = []
+
+    def _new_component(self, members):
+        component_id = next(self.ids)
+        self.members[component_id] = set(members)
+        for v in members:
+            self.label[v] = component_id
+        return component_id
+
+    def edges_changed(self, changes):
+        '''
+        Apply a batch of (u, v, old_weight, new_weight) edge changes.
+        A weight of 0 means there is no edge.
+        '''
+        changes = net_changes(changes)
+        inserted = [(u, v) for (u, v, old, new) in changes if not old and new]
+        removed = [(u, v) for (u, v, old, new) in changes if old and not new]
+        for u, v in inserted:
+            self.adj[u].add(v)
+            self.adj[v].add(u)
+        for u, v in removed:
+            self.adj[u].discard(v)
+            self.adj[v].discard(u)
+
+        # Insertions first, then every component that lost links is checked
+        # ... against the final edges
+        for u, v in inserted:
+            self._union(u, v)
+        removed_by_component = {}
+        for u, v in removed:
+            removed_by_component.setdefault(self.label[u], []).append((u, v))
+        for component_id, edges in removed_by_component.items():
+            if len(edges) == 1: self._split_edge(component_id, *edges[0])
+            else: self._split_all(component_id)
+
+    def node_added(self, index):
+        # A new vertex at the end or a retired index being reused, not connected to anything yet
+        if index == len(self.adj):
+            self.adj.append(set())
+            self.label.append(None)
+        assert(self.label[index] is None)
+        self._new_component([index])
+
+    def node_retired(self, index):
+        # Its links were removed first, so it is alone in its component
+        component_id = self.label[index]
+        assert(self.members[component_id] == {index})
+        del self.members[component_id]
+        self.label[index] = None
+
+    def _union(self, u, v):
+        kept, absorbed = self.label[u], self.label[v]
+        if kept == absorbed: return
+        if len(self.members[kept]) < len(self.members[absorbed]): kept, absorbed = absorbed, kept
+        for w in self.members[absorbed]:
+            self.label[w] = kept
+        self.members[kept] |= self.members.pop(absorbed)
+        self.events.append(("merge", kept, absorbed))
+
+    def _split_edge(self, component_id, u, v):
+        # A single link of the component went down
+        seen = [{u}, {v}]
+        queues = [deque([u]), deque([v])]
+        while True:
+            for side in (0, 1):
+                if not len(queues[side]):
+                    # Ran out first, this side is a component of its own now
+                    self._split_off(component_id, seen[side])
+                    return
+                w = queues[side].popleft()
+                for x in self.adj[w]:
+                    if x in seen[1 - side]: return
+                    if x not in seen[side]:
+                        seen[side].add(x)
+                        queues[side].append(x)
+
+    def _split_all(self, component_id):
+        # Several links of the component went down, search all of it again
+        unvisited = set(self.members[component_id])
+        parts = []
+        while len(unvisited):
+            start = unvisited.pop()
+            part = {start}
+            queue = deque([start])
+            while queue:
+                w = queue.popleft()
+                for x in self.adj[w]:
+                    if x in unvisited:
+                        unvisited.discard(x)
+                        part.add(x)
+                        queue.append(x)
+            parts.append(part)
+        # The largest part keeps the id, so the fewest labels change
+        parts.sort(key=len, reverse=True)
+        for part in parts[1:]:
+            self._split_off(component_id, part)
+
+    def _split_off(self, component_id, part):
+        self.members[component_id] -= part
+        self.events.append(("split", component_id, self._new_component(part)))
+
+    def component(self, index):
+        return self.label[index]
+
+    def sizes(self):
+        # {component id: number of members}
+        return {component_id:len(members) for component_id,members in self.members.items()}
+
+    def components(self):
+        # Sorted member lists ordered by lowest member, as subGraphs
+        return sorted(sorted(members) for members in self.members.values())
+
+    def pop_events(self):
+        events, self.events = self.events, []
+        return events
@@ -1,4 +1,9 @@
 import sys
+import numpy as np
+from algorithms.shortest_paths import allPairsShortestPaths
+from algorithms.graph_center import graphCenter
+from structures.sparse_topology import SparseTopology
+from helpers.disk_cache import array_key
 
 # Python Program for Floyd Warshall Algorithm 
 # Originally Sourced from GeeksforGeeks
@@ -45,6 +50,26 @@ def floydWarshall(graph, print_log = False):
                 dist[i][j] = min(dist[i][j], dist[i][k]+ dist[k][j]) 
     if print_log: printSolution(dist) 
     return dist
+
+# Same as above, but the i and j loops are done at once with NumPy
+# ... for each k, dist[i][j] = min(dist[i][j], dist[i][k] + dist[k][j])
+# ... is a broadcast of column k against row k
+# Returns the distances as an array instead of nested lists
+def floydWarshallNumpy(graph, print_log = False):
+    dist = np.array(graph)
+    V = len(dist)
+    for k in range(V):
+        dist = np.minimum(dist, dist[:, k, None] + dist[None, k, :])
+    if print_log: printSolution(dist)
+    return dist
+
+# Eccentricity (longest shortest path) of every vertex
+# ... and the radius, diameter and center that follow from it
+def eccentricityStats(dist):
+    eccentricity = dist.max(axis=1)
+    radius = eccentricity.min()
+    center = np.flatnonzero(eccentricity == radius).tolist()
+    return eccentricity, center, radius, eccentricity.max()
   
 
 # A utility function to print the solution 
@@ -60,24 +85,43 @@ def printSolution(dist):
             if j == V-1: 
                 print("")
   
-def floydWarshallCenter(graph, print_stats = False):
-    dist = floydWarshall(graph, print_stats)
-    N = len(dist)
-    longest_shortest_path = [max([(dist,i) for j, dist in enumerate(dist[i])], key=lambda o: o[0]) for i in range(N)]
-    if print_stats: print("FW longest shwrtest", longest_shortest_path)
-    center_min = min(longest_shortest_path, key=lambda o: o[0])[0]
-    center = [o[1] for o in longest_shortest_path if o[0] == center_min]
-    diameter = max(longest_shortest_path, key=lambda o: o[0])
+# `method` selects the all pairs shortest path backend
+# ... "auto" uses BFS/Dijkstra on sparse graphs (see shortest_paths.py)
+# ... "bounded" skips the distance matrix and prunes on eccentricity bounds (see graph_center.py)
+# With a `cache` (helpers/disk_cache.py) the distances are stored by graph
+# ... and loaded instead of recomputed the next time
+def floydWarshallCenter(graph, print_stats = False, method = "auto", processes = None, cache = None):
+    if method == "bounded": return graphCenter(graph, print_stats)
+    if cache is not None:
+        dist, (eccentricity, center, center_min, diameter) = cachedCenterStats(graph, cache, method, processes)
+    else:
+        dist = allPairsShortestPaths(graph, method, processes)
+        eccentricity, center, center_min, diameter = eccentricityStats(dist)
+    if print_stats: printSolution(dist)
+    if print_stats: print("FW longest shortest", eccentricity.tolist())
     if print_stats: 
-        print("Found center node: {} with distance: {}, diameter: {}, radius: {}".format(center[1], center[0], diameter[0],  center[0]))
-    return center, center_min, diameter[0]
+        print("Found center node: {} with distance: {}, diameter: {}, radius: {}".format(center, center_min, diameter, center_min))
+    return center, center_min, diameter
+
+def cachedCenterStats(graph, cache, method = "auto", processes = None):
+    # Every method gives the same distances, so only the graph is in the key
+    if isinstance(graph, SparseTopology): graph = graph.formatted(INF)
+    key = array_key(np.asarray(graph), kind="center")
+    entry = cache.get(key)
+    if entry is not None:
+        stats = (entry["eccentricity"], entry["center"].tolist(), entry["radius"][()], entry["diameter"][()])
+        return entry["dist"], stats
+    dist = allPairsShortestPaths(graph, method, processes)
+    stats = eccentricityStats(dist)
+    eccentricity, center, radius, diameter = stats
+    cache.put(key, dist=dist, eccentricity=eccentricity, center=np.array(center, dtype=int), radius=radius, diameter=diameter)
+    return dist, stats
 
-def pathSum(graph):
-    dist = floydWarshall(graph)
-    center,_,_ = floydWarshallCenter(graph)
-    N = len(dist)
-    res = [sum([dist for j, dist in enumerate(dist[i])]) for i in range(N)]
-    maximum = [max([dist for j, dist in enumerate(dist[i])]) for i in range(N)]
+def pathSum(graph, method = "auto", processes = None):
+    dist = allPairsShortestPaths(graph, method, processes)
+    eccentricity, center, _, _ = eccentricityStats(dist)
+    res = dist.sum(axis=1).tolist()
+    maximum = eccentricity.tolist()
     return res,maximum,center
   
 if __name__ == "__main__":
@@ -0,0 +1,74 @@
+import numpy as np
+
+from algorithms.shortest_paths import INF, adjacencyLists, isUnitWeight, searches
+from structures.sparse_topology import SparseTopology
+
+# Graph center, radius and diameter from eccentricity bounds
+# ... (Takes and Kosters, "Computing the Eccentricity Distribution of Large Graphs")
+# A single source search from v gives, for every other vertex w,
+# ... max(d(v,w), ecc(v) - d(v,w)) <= ecc(w) <= ecc(v) + d(v,w)
+# Vertices whose bounds meet, or that can neither be a center nor
+# ... raise the diameter, are dropped; usually only a handful of
+# ... searches are needed instead of all pairs shortest paths
+
+
+def boundedEccentricityCenter(adj, print_stats = False, dtype = None):
+    '''
+    Return (center, radius, diameter) of the graph given as adjacency
+    lists [[(neighbor, weight), ...], ...], same as floydWarshallCenter.
+    Distances are kept as `dtype`, by default integers unless a weight is fractional.
+    '''
+    V = len(adj)
+    search = searches["bfs" if isUnitWeight(adj) else "dijkstra"]
+    if dtype is None:
+        dtype = np.int64 if all(isinstance(w, (int, np.integer)) for edges in adj for _,w in edges) else np.float64
+    lower = np.zeros(V, dtype=dtype)
+    upper = np.full(V, INF, dtype=dtype)
+    # Known eccentricities, -1 if not known
+    ecc = np.full(V, -1, dtype=dtype)
+    candidates = np.ones(V, dtype=bool)
+    radius_upper, diameter_lower = INF, 0
+    searches_done = 0
+
+    while candidates.any():
+        # Alternate between the most likely center (smallest lower bound)
+        # ... and the most likely periphery (largest upper bound)
+        if searches_done % 2 == 0:
+            v = np.flatnonzero(candidates)[np.argmin(lower[candidates])]
+        else:
+            v = np.flatnonzero(candidates)[np.argmax(upper[candidates])]
+        dist = np.array(search(adj, v), dtype=dtype)
+        searches_done += 1
+        e = dist.max()
+        if e >= INF:
+            # Disconnected, every eccentricity is infinite (as with Floyd Warshall)
+            return list(range(V)), dist.dtype.type(INF), dist.dtype.type(INF)
+        ecc[v] = e
+        candidates[v] = False
+        radius_upper = min(radius_upper, e)
+        diameter_lower = max(diameter_lower, e)
+
+        lower = np.maximum(lower, np.maximum(dist, e - dist))
+        upper = np.minimum(upper, e + dist)
+
+        # Bounds met, eccentricity is known without a search
+        solved = candidates & (lower == upper)
+        ecc[solved] = lower[solved]
+        radius_upper = min(radius_upper, lower[solved].min(initial=INF))
+        diameter_lower = max(diameter_lower, lower[solved].max(initial=0))
+        # Cannot be a center and cannot be further than the known diameter
+        pruned = candidates & (lower > radius_upper) & (upper <= diameter_lower)
+        candidates &= ~(solved | pruned)
+
+    known = ecc >= 0
+    radius = ecc[known].min()
+    center = np.flatnonzero(ecc == radius).tolist()
+    if print_stats:
+        print("Found center: {} radius: {}, diameter: {} with {} searches".format(center, radius, diameter_lower, searches_done))
+    return center, radius, diameter_lower
+
+def graphCenter(graph, print_stats = False):
+    # Same input as floydWarshallCenter (INF padded matrix)
+    # ... and the same distance type as allPairsShortestPaths
+    dtype = graph.data.dtype if isinstance(graph, SparseTopology) else np.asarray(graph).dtype
+    return boundedEccentricityCenter(adjacencyLists(graph), print_stats, dtype)
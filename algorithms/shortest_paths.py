@@ -0,0 +1,110 @@
+import heapq
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from structures.sparse_topology import SparseTopology
+
+# All pairs shortest paths for sparse graphs
+# ... runs one single source search per vertex over adjacency lists
+# ... BFS when every edge has weight 1, Dijkstra otherwise
+# Takes the same INF padded matrix as floydWarshall (see `format_graph`)
+# ... or a SparseTopology (where missing edges are simply absent)
+
+INF  = 99999
+
+# Vectorized Floyd Warshall relaxes roughly this many more (i,j,k)
+# ... triples per second than a Python search visits edges, used to
+# ... pick the cheaper backend: V^3 vs FW_SPEEDUP * V * (V + E)
+FW_SPEEDUP = 40
+
+
+def adjacencyLists(graph):
+    if isinstance(graph, SparseTopology):
+        return [[(v, w) for v,w in edges if v != u] for u,edges in enumerate(graph.adjacency_lists())]
+    g = np.asarray(graph)
+    V = len(g)
+    has_edge = (g < INF) & ~np.eye(V, dtype=bool)
+    adj = [[] for _ in range(V)]
+    for u, v in zip(*np.nonzero(has_edge)):
+        adj[u].append((int(v), g[u][v].item()))
+    return adj
+
+def isUnitWeight(adj):
+    return all(w == 1 for edges in adj for _,w in edges)
+
+def chooseMethod(V, E, unit_weight):
+    # Dense graphs are cheaper with one vectorized Floyd Warshall
+    if V ** 3 <= FW_SPEEDUP * V * (V + E): return "floyd_warshall"
+    return "bfs" if unit_weight else "dijkstra"
+
+
+def bfsDistances(adj, source):
+    dist = [INF] * len(adj)
+    dist[source] = 0
+    queue = deque([source])
+    while queue:
+        u = queue.popleft()
+        d = dist[u] + 1
+        for v,_ in adj[u]:
+            if dist[v] == INF:
+                dist[v] = d
+                queue.append(v)
+    return dist
+
+def dijkstraDistances(adj, source):
+    dist = [INF] * len(adj)
+    dist[source] = 0
+    heap = [(0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        # Stale entry, a shorter path was already settled
+        if d > dist[u]: continue
+        for v,w in adj[u]:
+            if d + w < dist[v]:
+                dist[v] = d + w
+                heapq.heappush(heap, (d + w, v))
+    return dist
+
+searches = {
+    "bfs": bfsDistances,
+    "dijkstra": dijkstraDistances,
+}
+
+def distancesFrom(adj, sources, method):
+    search = searches[method]
+    return [search(adj, s) for s in sources]
+
+
+def allPairsShortestPaths(graph, method = "auto", processes = None):
+    '''
+    Return the V x V array of shortest path lengths (INF if unreachable).
+    `method` is "auto", "bfs", "dijkstra" or "floyd_warshall"; "auto"
+    picks from the density and weights of the graph.
+    With `processes` > 1 the sources are split across a process pool.
+    '''
+    V = len(graph)
+    # Build the adjacency lists once, shared by every source
+    adj = adjacencyLists(graph) if method != "floyd_warshall" else None
+    if method == "auto":
+        method = chooseMethod(V, sum(len(edges) for edges in adj), isUnitWeight(adj))
+    if method == "floyd_warshall":
+        # Imported here to avoid a circular import
+        from algorithms.floyd_warshall import floydWarshallNumpy
+        if isinstance(graph, SparseTopology): graph = graph.formatted(INF)
+        return floydWarshallNumpy(graph)
+    assert(method in searches)
+    return _allPairs(graph, adj, method, processes)
+
+def _allPairs(graph, adj, method, processes):
+    V = len(adj)
+    if processes is None or processes <= 1 or V < 2:
+        rows = distancesFrom(adj, range(V), method)
+    else:
+        # One contiguous block of sources per task keeps pickling of `adj` low
+        step = -(-V // processes)
+        blocks = [range(s, min(s + step, V)) for s in range(0, V, step)]
+        with ProcessPoolExecutor(processes) as executor:
+            results = executor.map(distancesFrom, [adj] * len(blocks), blocks, [method] * len(blocks))
+            rows = [row for block in results for row in block]
+    dtype = graph.data.dtype if isinstance(graph, SparseTopology) else np.asarray(graph).dtype
+    return np.array(rows, dtype=dtype).reshape(V, V)
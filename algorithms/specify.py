@@ -1,14 +1,60 @@
 import copy
-from helpers.fiedler import fiedler as calc_fiedler
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from helpers.fiedler import fiedler as calc_fiedler, fiedler_vector
 
 # Currently only supports undirected
 # ... but can easly extend to directed
 
+# Ranking modes for candidate edges
+# ... "exact": compute the Fiedler value without every edge
+# ... "perturbation": rank edges by the first order change in the Fiedler
+# ...     value, w * (x_u - x_v)^2 for Fiedler vector x, and only compute
+# ...     the exact value for the `top_k` best ranked edges
+# ...     with `batch` > 1, also try removing up to `batch` of the least
+# ...     sensitive edges at once while far from the target
+# With an `executor` (e.g. ProcessPoolExecutor) candidate edges are
+# ... evaluated in parallel, `chunk_size` edges per task, with workers
+# ... reading the graph from shared memory instead of a copy per candidate
+
+
+def fiedler_without_edges(g, edges, fiedler_check):
+    # Fiedler value without each edge, removing and restoring on one copy
+    g = np.array(g)
+    values = []
+    for (u,v) in edges:
+        w = g[u][v]
+        g[u][v] = 0
+        g[v][u] = 0
+        values.append(fiedler_check(g))
+        g[u][v] = w
+        g[v][u] = w
+    return values
+
+def shared_fiedler_without_edges(shm_name, shape, dtype, edges, fiedler_check):
+    # Runs in a worker, attaches to the graph the parent put in shared memory
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        g = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        return fiedler_without_edges(g, edges, fiedler_check)
+    finally:
+        shm.close()
+
+
 class SpecifySmallStep():
-    def __init__(self, g, fiedler_check = calc_fiedler, report_obj = {}):
+    def __init__(self, g, fiedler_check = calc_fiedler, report_obj = {}, ranking = "exact", top_k = 8, batch = 1, executor = None, chunk_size = 32):
+        assert(ranking == "exact" or ranking == "perturbation")
         self.graph = g
         self.fiedler_check = fiedler_check
         self.report_obj = report_obj
+        self.ranking = ranking
+        self.top_k = top_k
+        self.batch = batch
+        self.executor = executor
+        self.chunk_size = chunk_size
+        # Last Fiedler vector, warm starts the next solve
+        self.vector = None
 
     def is_valid_edge(self, f, target, current, bound,allow_disconnected):
         if not allow_disconnected and f <= 0.001:
@@ -19,17 +65,43 @@ class SpecifySmallStep():
             return False
         return True
 
-    def fiedler_without_edge(self, g, u, v):
-        self.report_obj["considerations_till_arrived"] += 1
+    def without_edge(self, g, u, v):
         g = copy.deepcopy(g)
         g[u][v] = 0
         g[v][u] = 0
-        return self.fiedler_check(g), g
+        return g
+
+    def fiedler_without_edges(self, g, edges):
+        # Returns [(fiedler, (u,v))] in the order of `edges`
+        self.report_obj["considerations_till_arrived"] += len(edges)
+        if self.executor is None or len(edges) <= 1:
+            return list(zip(fiedler_without_edges(g, edges, self.fiedler_check), edges))
+        g = np.asarray(g)
+        shm = shared_memory.SharedMemory(create=True, size=max(g.nbytes, 1))
+        try:
+            np.ndarray(g.shape, dtype=g.dtype, buffer=shm.buf)[:] = g
+            chunks = [edges[i:i + self.chunk_size] for i in range(0, len(edges), self.chunk_size)]
+            futures = [self.executor.submit(shared_fiedler_without_edges, shm.name, g.shape, g.dtype, chunk, self.fiedler_check) for chunk in chunks]
+            values = [f for future in futures for f in future.result()]
+        finally:
+            shm.close()
+            shm.unlink()
+        return list(zip(values, edges))
+
+    def best_option(self, options, target, current, bound, allow_disconnected, g):
+        in_range = list(filter(lambda item: self.is_valid_edge(item[0], target, current, bound,allow_disconnected), options))
+        # Take the edge that reduces the Fiedler value the least
+        best = min(in_range, key=lambda tup: tup[0], default=None)
+        if best is None: return None
+        f, (u,v) = best
+        return f, self.without_edge(g, u, v)
 
     def find_min_edge(self, g, target, current, bound, allow_disconnected):
         self.report_obj["considerations_till_arrived"] = 0
+        if self.ranking == "perturbation":
+            return self.find_min_edge_perturbation(g, target, current, bound, allow_disconnected)
         l = len(g)
-        options = []
+        edges = []
         for u in range(l):
             # want to ensure u < v
             # ... to prevent double traversing
@@ -37,20 +109,61 @@ class SpecifySmallStep():
             for v in range(u + 1, l):
                 assert(u < v)
                 if g[u][v] == 0: continue
-                res = self.fiedler_without_edge(g,u,v)
-                options.append(res)
-        in_range = list(filter(lambda item: self.is_valid_edge(item[0], target, current, bound,allow_disconnected), options))
-        # Take the edge that reduces the Fiedler value the least
-        return min(in_range, key=lambda tup: tup[0], default=None)
+                edges.append((u,v))
+        options = self.fiedler_without_edges(g, edges)
+        return self.best_option(options, target, current, bound, allow_disconnected, g)
+
+    def edge_sensitivities(self, g):
+        # First order drop of the Fiedler value when removing each edge
+        # ... removing (u,v) changes L by -w (e_u - e_v)(e_u - e_v)^T
+        _, x = fiedler_vector(g, v0=self.vector if self.vector is not None and len(self.vector) == len(g) else None)
+        self.vector = x
+        us, vs = np.nonzero(np.triu(g, 1))
+        return us, vs, g[us, vs] * (x[us] - x[vs]) ** 2
+
+    def find_min_edge_perturbation(self, g, target, current, bound, allow_disconnected):
+        us, vs, drop = self.edge_sensitivities(g)
+        # The estimate is a Rayleigh quotient, so the true value is never above it
+        estimate = current - drop
+        order = np.argsort(estimate, kind="stable")
+        if bound == "one":
+            # ... so edges estimated below the target are certainly below it
+            order = order[estimate[order] >= target]
+        # Verify the best ranked edges exactly, top_k at a time
+        for start in range(0, len(order), self.top_k):
+            options = self.fiedler_without_edges(g, [(us[i], vs[i]) for i in order[start:start + self.top_k]])
+            res = self.best_option(options, target, current, bound, allow_disconnected, g)
+            if res is not None: return res
+        return None
+
+    def remove_batch(self, g, size, target, current, bound, allow_disconnected):
+        # Remove the `size` least sensitive edges at once, if still valid
+        us, vs, drop = self.edge_sensitivities(g)
+        order = np.argsort(drop, kind="stable")[:size]
+        g = copy.deepcopy(g)
+        g[us[order], vs[order]] = 0
+        g[vs[order], us[order]] = 0
+        f = self.fiedler_check(g)
+        if not self.is_valid_edge(f, target, current, bound, allow_disconnected): return None
+        return f, g
 
     def cut_edges(self, target, bound = "two", allow_disconnected = False):
+        start_time = time.perf_counter()
         g = copy.deepcopy(self.graph)
         fiedler = self.fiedler_check(g)
+        batch = self.batch
 
         # Once the following constraints are violated, removing any edge is detrimental
         while fiedler > target and fiedler > 0:
             # print("fiedler ", fiedler)
-            res = self.find_min_edge(g, target, fiedler, bound, allow_disconnected)
+            res = None
+            if self.ranking == "perturbation" and self.batch > 1:
+                res = self.remove_batch(g, batch, target, fiedler, bound, allow_disconnected)
+                # Grow the batch while it works, shrink it once it overshoots
+                # ... down to a single edge, from where it can still grow back
+                batch = min(batch * 2, self.batch) if res is not None else max(batch // 2, 1)
+            if res is None:
+                res = self.find_min_edge(g, target, fiedler, bound, allow_disconnected)
             if res is None:
                 # print("quit")
                 break
@@ -58,6 +171,7 @@ class SpecifySmallStep():
             fiedler = f
             g = g_next
 
+        self.report_obj["wall_time"] = time.perf_counter() - start_time
         return fiedler, g
 
     def create_graph(self, target, bound = "two", allow_disconnected = False):
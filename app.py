@@ -9,32 +9,27 @@ from helpers.get_edges import get_edges
 from helpers.print_graph import print_graph
 from algorithms.floyd_warshall import floydWarshall, floydWarshallCenter
 from algorithms.specify import SpecifySmallStep
+from data.generators import specified_graph
+from helpers.disk_cache import DiskCache
 import random
-from structures.timed_communication_network import TimedNeighborCommunication, TimedBroadcastNode, TimedEnvironment
-from structures.id_manager import IdManager
+from structures.simulation_session import SimulationSession
 import pandas as pd
 import networkx as nx
 from helpers.mkdir_p import mkdir_p
 import matplotlib.ticker as plticker
 
-random.seed(12)
+# Seeded generator for the random weights, not the global state
+rng = random.Random(12)
 INF  = 99999
+# Set from --cache, shared by the graph generation and the centers
+cache = None
 
 
 def random_graph(size, target_fiedler = 0.5):
-    graph = np.array([np.array([0 if i == j else 1 for j in range(size)]) for i in range(size)])
-    tree = SpecifySmallStep(graph).create_graph(target_fiedler, bound="one")
-    return tree
+    return specified_graph(size, target_fiedler, cache=cache)
 
 def random_weighted_graph(size, target_fiedler = 0.5):
-    graph = np.array([np.array([0 if i == j else random.randint(1,40) for j in range(size)]) for i in range(size)])
-    # Make undirected (Currently only supports undirected)
-    for u in range(len(graph)):
-        for v in range(len(graph)):
-            if u < v:
-                graph[v][u] = graph[u][v]
-    tree = SpecifySmallStep(graph).create_graph(target_fiedler, bound="one")
-    return tree
+    return specified_graph(size, target_fiedler, weighted=True, rng=rng, cache=cache)
 
 def generate_random_graphs(n, target_fiedler = 0.5, random_w = False):
     # Generate fully connected
@@ -48,28 +43,17 @@ def generate_random_graphs(n, target_fiedler = 0.5, random_w = False):
 
 def evaluate_noisy_broadcast(graph):
     # Setup flock
-    flock_size = len(graph)
-    nodes = [TimedBroadcastNode(flock_size) for i in range(flock_size)]
-    manager = IdManager(graph, nodes)
-    env = TimedEnvironment(graph, manager)
-    for node in nodes:
-        node.set_communicator(TimedNeighborCommunication(node.id, manager, env))
+    session = SimulationSession(graph)
+    manager, nodes = session.manager, session.nodes
 
     # Fill routing table
-    for node in nodes:
-        node.setup()
-    t_steps = 0
-    last_t_steps = t_steps
-    while(len(env.packet_queue)):
-        # t_steps += 1
-        last_t_steps = t_steps
-        env.run()
-        t_steps = env.time
+    session.setup()
+    t_steps = session.run()
     
     print("took t={} to complete broadcast".format(t_steps))
 
     # Assert all equal
-    center = set(manager.get_index(leader) for leader in node.leader)
+    center = set(manager.get_index(leader) for leader in nodes[-1].leader)
     for i,node in enumerate(nodes):
         if i != 0:
             leader_set = set(manager.get_index(leader) for leader in node.leader)
@@ -91,7 +75,10 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--formation", type=int, help="enter a formation number/id",
                         nargs='?', default=0, const=0, choices=range(0, len(formations) + 1))
+    parser.add_argument("--cache", help="directory to cache generated graphs and centers in")
+    parser.add_argument("--cache-mb", type=float, default=256, help="size bound of the cache, least recently used entries are evicted")
     args = parser.parse_args()
+    if args.cache: cache = DiskCache(args.cache, int(args.cache_mb * 2**20))
 
     # To Create a Formation, add one to `formations.py`
     if args.formation == 0:
@@ -127,7 +114,7 @@ if __name__ == "__main__":
         formatted = format_graph(graph)
         # print("formatted")
         # print_graph(formatted)
-        center, radius, diameter = floydWarshallCenter(formatted)
+        center, radius, diameter = floydWarshallCenter(formatted, cache=cache)
         predicted = evaluate_noisy_broadcast(graph)
         result = ""
         # If not predicted any false and at least one element in predicted also in true
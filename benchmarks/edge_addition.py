@@ -0,0 +1,52 @@
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.append('.')
+from benchmarks.graphs import random_mesh
+from structures.simulation_session import SimulationSession
+from structures.timed_communication_network import DynamicTimedEnvironment
+
+# Routing table traffic when links appear in a converged random geometric
+# ... mesh, with full or delta tables, as dicts or packed arrays
+# Run from the repository root: python benchmarks/edge_addition.py
+
+
+def run(graph, new_edges, node_args):
+    session = SimulationSession(graph, environment_class=DynamicTimedEnvironment, track_shortest_paths=True, node_args=node_args, measure_payloads=True)
+    session.setup()
+    session.run()
+    start = time.time()
+    for (u, v) in new_edges:
+        session.env.add_edge(u, v)
+        session.recalibrate()
+    elapsed = time.time() - start
+    truth = {}
+    for members, center, _, _ in session.env.shortest_paths.components():
+        for member in members: truth[member] = set(center)
+    correct = all(leaders == truth[i] for i,leaders in enumerate(session.leaders()))
+    return session, elapsed, correct
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=60)
+    parser.add_argument("--radius", type=float, default=0.2)
+    parser.add_argument("--edges", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    graph = random_mesh(args.size, args.radius, args.seed)
+    rng = np.random.default_rng(args.seed)
+    missing = [(u, v) for u in range(args.size) for v in range(u + 1, args.size) if not graph[u][v]]
+    new_edges = [missing[i] for i in rng.choice(len(missing), args.edges, replace=False)]
+    print("Mesh: {} nodes, {} links, adding {}".format(args.size, int(graph.sum()) // 2, new_edges))
+    print("{:>6} {:>8} {:>14} {:>14} {:>16} {:>10} {:>8} {:>8}".format(
+        "delta", "encoding", "table packets", "table bytes", "bytes per packet", "all bytes", "seconds", "correct"))
+    for table_delta in [False, True]:
+        for table_encoding in ["dict", "packed"]:
+            session, elapsed, correct = run(graph, new_edges, {"table_delta": table_delta, "table_encoding": table_encoding})
+            packets, size, per_packet = session.payload_sizes().get("edges_added", (0, 0, 0))
+            print("{:>6} {:>8} {:>14} {:>14} {:>16.0f} {:>10} {:>8.1f} {:>8}".format(
+                str(table_delta), table_encoding, packets, size, per_packet, session.bytes_sent(), elapsed, str(correct)))
@@ -0,0 +1,29 @@
+import numpy as np
+
+from algorithms.shortest_paths import INF
+
+# Generated formations for the benchmarks
+
+
+def random_mesh(size, radius, seed):
+    # Unit weight links between points closer than `radius` in the unit square
+    rng = np.random.default_rng(seed)
+    points = rng.random((size, 2))
+    dist = np.sqrt(((points[:, None, :] - points[None, :, :]) ** 2).sum(-1))
+    return ((dist < radius) & ~np.eye(size, dtype=bool)).astype(int)
+
+def mesh_radius(size, degree):
+    # Radius giving about `degree` links per node, so sweeps keep the density
+    return np.sqrt(degree / (np.pi * size))
+
+def formation(size, degree = 6, seed = 1):
+    return random_mesh(size, mesh_radius(size, degree), seed)
+
+def formatted(graph):
+    # INF padded matrix, as expected by floydWarshallCenter
+    padded = np.where(graph > 0, graph, INF)
+    np.fill_diagonal(padded, 0)
+    return padded
+
+def complete_graph(size):
+    return np.ones((size, size), dtype=int) - np.eye(size, dtype=int)
@@ -0,0 +1,43 @@
+import sys
+import time
+import argparse
+
+sys.path.append('.')
+from benchmarks.graphs import random_mesh, formatted
+from structures.simulation_session import SimulationSession
+from algorithms.floyd_warshall import floydWarshallCenter
+
+# Static election on a random geometric mesh, sending every lsp_update
+# ... on its own and with lsp_update batching (several windows)
+# Run from the repository root: python benchmarks/lsp_batching.py
+
+
+def run(graph, batch_window):
+    session = SimulationSession(graph, node_args={"batch_window": batch_window}, record_leader_changes=True, measure_payloads=True)
+    start = time.time()
+    session.setup()
+    t_steps = session.run()
+    elapsed = time.time() - start
+    # Converged once the last node settled on its leader
+    converged = max(t for t,_,_ in session.env.leader_changes)
+    return session, converged, t_steps, elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=50)
+    parser.add_argument("--radius", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 1, 2, 4])
+    args = parser.parse_args()
+
+    graph = random_mesh(args.size, args.radius, args.seed)
+    center = set(floydWarshallCenter(formatted(graph))[0])
+    print("Mesh: {} nodes, {} links, center {}".format(args.size, int(graph.sum()) // 2, sorted(center)))
+    print("{:>8} {:>10} {:>14} {:>12} {:>10} {:>10} {:>8} {:>8}".format(
+        "window", "packets", "announcements", "bytes", "converged", "quiet", "seconds", "correct"))
+    for batch_window in [None] + args.windows:
+        session, converged, t_steps, elapsed = run(graph, batch_window)
+        correct = all(leaders == center for leaders in session.leaders())
+        print("{:>8} {:>10} {:>14} {:>12} {:>10} {:>10} {:>8.1f} {:>8}".format(
+            str(batch_window), session.packets_sent(), session.lsp_announcements(), session.bytes_sent(),
+            converged, t_steps, elapsed, str(correct)))
@@ -0,0 +1,49 @@
+import sys
+import time
+import tracemalloc
+import argparse
+
+sys.path.append('.')
+from structures.timed_communication_network import Packet, PacketMeta
+from structures.simulation_session import SimulationSession
+from benchmarks.graphs import random_mesh
+
+# Allocations per delivered packet during the setup() broadcast
+# ... of a random geometric mesh, with and without the packet pool
+# Run from the repository root: python benchmarks/packet_allocations.py
+
+
+def run(graph, recycle_packets):
+    session = SimulationSession(graph, recycle_packets=recycle_packets)
+    tracemalloc.start()
+    start = time.time()
+    session.setup()
+    delivered = 0
+    while len(session.env.packet_queue):
+        session.env.run()
+        delivered += 1
+    elapsed = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    pool = session.env.packet_pool
+    return delivered, pool.allocated, pool.reused, peak, elapsed
+
+def object_bytes():
+    packet = Packet({}, 1, None, 0)
+    meta = PacketMeta(packet, 1, 2)
+    return sys.getsizeof(packet), sys.getsizeof(meta)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100)
+    parser.add_argument("--radius", type=float, default=0.12)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    graph = random_mesh(args.size, args.radius, args.seed)
+    print("Mesh: {} nodes, {} links".format(args.size, int(graph.sum()) // 2))
+    print("Bytes per packet: {}, per meta: {}".format(*object_bytes()))
+    for recycle_packets in [False, True]:
+        delivered, allocated, reused, peak, elapsed = run(graph, recycle_packets)
+        print("recycle_packets={}: delivered {}, allocated {} ({:.2f} per delivered packet), reused {}, peak {:.1f} MB, {:.1f}s".format(
+            recycle_packets, delivered, allocated, allocated / delivered, reused, peak / 1e6, elapsed))
@@ -0,0 +1,65 @@
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.append('.')
+from benchmarks.graphs import formation
+from structures.sparse_topology import SparseTopology
+from structures.simulation_session import SimulationSession
+from structures.timed_communication_network import DynamicTimedEnvironment
+from algorithms.connected_components import subGraphs
+
+# Flocks-Split-Merge scaled up: two meshes joined through a hub node
+# ... repeatedly split off and merged back, components tracked by the
+# ... environment against subGraphs from scratch after every step
+# Run from the repository root: python benchmarks/split_merge.py --size 2000
+
+
+def split_merge_topology(size, degree, links, seed):
+    # Two meshes of size // 2, the hub is the last node linked to `links` nodes of each
+    half = size // 2
+    rng = np.random.default_rng(seed)
+    edges = []
+    for offset, mesh in [(0, formation(half, degree, seed)), (half, formation(half, degree, seed + 1))]:
+        rows, cols = np.nonzero(np.triu(mesh, 1))
+        edges += [(u + offset, v + offset, 1) for u,v in zip(rows.tolist(), cols.tolist())]
+    hub = 2 * half
+    links_a = rng.choice(half, links, replace=False).tolist()
+    links_b = (half + rng.choice(half, links, replace=False)).tolist()
+    edges += [(v, hub, 1) for v in links_a + links_b]
+    return SparseTopology.from_edges(hub + 1, edges), hub, links_a
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=2000)
+    parser.add_argument("--degree", type=float, default=8)
+    parser.add_argument("--links", type=int, default=5, help="links from the hub into each flock")
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    topology, hub, links_a = split_merge_topology(args.size, args.degree, args.links, args.seed)
+    # No election is run, only the topology changes
+    session = SimulationSession(topology, environment_class=DynamicTimedEnvironment, track_connectivity=True)
+    env = session.env
+    print("Split-merge: {} nodes, {} links, {} components".format(len(topology), topology.nnz() // 2, len(env.connectivity.members)))
+
+    tracked, scratch = 0, 0
+    for step in range(args.steps):
+        # Even steps split the first flock off, odd steps merge it back
+        change = (lambda: env.remove_edges([(v, hub) for v in links_a])) if step % 2 == 0 else (lambda: env.add_edges([(v, hub) for v in links_a]))
+        start = time.perf_counter()
+        change()
+        sizes = env.connectivity.sizes()
+        tracked += time.perf_counter() - start
+        events = env.connectivity.pop_events()
+
+        start = time.perf_counter()
+        sub_graphs = subGraphs(env.adj_matrix)
+        scratch += time.perf_counter() - start
+        assert(sorted(len(m) for m,_ in sub_graphs) == sorted(sizes.values()))
+        print("step {}: {} components, largest {}, events {}".format(step, len(sizes), max(sizes.values()), events))
+
+    print("tracked: {:.4f}s per step, subGraphs: {:.4f}s per step".format(tracked / args.steps, scratch / args.steps))
@@ -0,0 +1,156 @@
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+
+sys.path.append('.')
+from benchmarks.graphs import formation, formatted, complete_graph
+from structures.simulation_session import SimulationSession
+from structures.timed_communication_network import DynamicTimedEnvironment
+from algorithms.floyd_warshall import floydWarshallCenter
+from algorithms.connected_components import subGraphs
+from algorithms.specify import SpecifySmallStep
+from helpers.fiedler import fiedler
+
+# Simulator and graph algorithm benchmarks over a sweep of formation sizes
+# ... runs offline, numpy only
+# Each benchmark is a pair of functions: `prepare(size, options)` builds its
+# ... input (not timed) and `run(state)` is timed, returning extra metrics
+# Run from the repository root:
+#   python benchmarks/suite.py --sizes 16 32 64 --json results.json
+#   python benchmarks/suite.py --compare results.json   (flags regressions)
+
+
+def prepare_setup(size, options):
+    graph = formation(size, options.degree, options.seed)
+    return SimulationSession(graph, event_queue=options.event_queue)
+
+def run_setup(session):
+    # setup() broadcast until the network is quiet
+    session.setup()
+    session.run()
+    return {"events": session.env.events, "messages_per_node": session.packets_sent() / len(session.nodes)}
+
+def prepare_recalibrate(size, options):
+    graph = formation(size, options.degree, options.seed)
+    session = SimulationSession(graph, environment_class=DynamicTimedEnvironment, event_queue=options.event_queue)
+    session.setup()
+    session.run()
+    # Links of the highest degree node go down, the network must reconverge
+    node_index = int(np.argmax(graph.sum(axis=1)))
+    session.env.remove_all_edges(node_index)
+    return session
+
+def run_recalibrate(session):
+    events, sent = session.env.events, session.packets_sent()
+    session.recalibrate()
+    return {"events": session.env.events - events, "messages_per_node": (session.packets_sent() - sent) / len(session.nodes)}
+
+def prepare_floyd_warshall_center(size, options):
+    return formatted(formation(size, options.degree, options.seed))
+
+def run_floyd_warshall_center(graph):
+    floydWarshallCenter(graph)
+    return {}
+
+def prepare_fiedler(size, options):
+    return formation(size, options.degree, options.seed)
+
+def run_fiedler(graph):
+    fiedler(graph)
+    return {}
+
+def prepare_sub_graphs(size, options):
+    # Sparser than the other formations, so there are several components
+    return formation(size, 2, options.seed)
+
+def run_sub_graphs(graph):
+    return {"components": len(subGraphs(graph))}
+
+def prepare_create_graph(size, options):
+    return complete_graph(size)
+
+def run_create_graph(graph):
+    SpecifySmallStep(graph, ranking="perturbation", batch=8).create_graph(0.5, bound="one")
+    return {}
+
+benchmarks = {
+    "setup": (prepare_setup, run_setup),
+    "recalibrate": (prepare_recalibrate, run_recalibrate),
+    "floydWarshallCenter": (prepare_floyd_warshall_center, run_floyd_warshall_center),
+    "fiedler": (prepare_fiedler, run_fiedler),
+    "subGraphs": (prepare_sub_graphs, run_sub_graphs),
+    "create_graph": (prepare_create_graph, run_create_graph),
+}
+
+
+def measure(name, size, options):
+    prepare, run = benchmarks[name]
+    # Best of `repeat` timings, each on a freshly prepared input
+    seconds = None
+    for _ in range(options.repeat):
+        state = prepare(size, options)
+        start = time.perf_counter()
+        metrics = run(state)
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+    # Peak memory from a separate run, tracing slows everything down
+    state = prepare(size, options)
+    tracemalloc.start()
+    run(state)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    result = {"benchmark": name, "size": size, "seconds": seconds, "peak_mb": peak / 1e6}
+    result.update(metrics)
+    if "events" in metrics:
+        result["events_per_second"] = metrics["events"] / seconds if seconds else float("inf")
+    return result
+
+def format_result(result):
+    line = "{:<20} {:>6} {:>10.4f}s {:>9.1f}MB".format(result["benchmark"], result["size"], result["seconds"], result["peak_mb"])
+    if "events_per_second" in result:
+        line += " {:>12.0f} events/s {:>10.1f} msgs/node".format(result["events_per_second"], result["messages_per_node"])
+    return line
+
+def compare(results, baseline, tolerance):
+    # Results slower than the baseline by more than `tolerance`
+    base = {(b["benchmark"], b["size"]):b for b in baseline}
+    regressions = []
+    for result in results:
+        key = (result["benchmark"], result["size"])
+        if key in base and result["seconds"] > base[key]["seconds"] * (1 + tolerance):
+            regressions.append((result, base[key]))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 32, 64])
+    parser.add_argument("--only", nargs="+", choices=list(benchmarks), default=list(benchmarks))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--degree", type=float, default=6, help="average links per node of the formations")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--event-queue", default="heap", help="event queue backend of the sessions")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="baseline results (from --json) to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    options = parser.parse_args()
+
+    results = []
+    for name in options.only:
+        for size in options.sizes:
+            result = measure(name, size, options)
+            print(format_result(result))
+            results.append(result)
+
+    if options.json:
+        with open(options.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if options.compare:
+        with open(options.compare) as f:
+            regressions = compare(results, json.load(f), options.tolerance)
+        for result, base in regressions:
+            print("REGRESSION {} size {}: {:.4f}s (was {:.4f}s)".format(result["benchmark"], result["size"], result["seconds"], base["seconds"]))
+        if len(regressions): sys.exit(1)
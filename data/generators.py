@@ -0,0 +1,41 @@
+import random
+
+import numpy as np
+
+from algorithms.specify import SpecifySmallStep
+from helpers.disk_cache import array_key
+
+# Generated formations, complete graphs cut down to a target Fiedler value
+# ... `rng` is a random.Random (or the random module) for the edge weights
+
+
+def complete_graph(size, weighted = False, rng = random):
+    if not weighted:
+        return np.array([np.array([0 if i == j else 1 for j in range(size)]) for i in range(size)])
+    graph = np.array([np.array([0 if i == j else rng.randint(1,40) for j in range(size)]) for i in range(size)])
+    # Make undirected (Currently only supports undirected)
+    for u in range(len(graph)):
+        for v in range(len(graph)):
+            if u < v:
+                graph[v][u] = graph[u][v]
+    return graph
+
+def specified_graph(size, target_fiedler = 0.5, weighted = False, rng = random, cache = None, **specify_args):
+    # The complete graph is always drawn, so `rng` advances the same with or without a cache
+    graph = complete_graph(size, weighted, rng)
+    if cache is None:
+        return SpecifySmallStep(graph, **specify_args).create_graph(target_fiedler, bound="one")
+    # How the work is split and reported does not change the graph, functions are keyed by name
+    params = {name:getattr(value, "__qualname__", value) for name,value in specify_args.items() if name not in ["executor", "chunk_size", "report_obj"]}
+    key = array_key(graph, kind="specified_graph", target_fiedler=target_fiedler, **params)
+    entry = cache.get(key)
+    if entry is not None: return entry["graph"]
+    specified = SpecifySmallStep(graph, **specify_args).create_graph(target_fiedler, bound="one")
+    cache.put(key, graph=specified)
+    return specified
+
+# Name -> weighted, for the sweep grid
+generators = {
+    "random": False,
+    "weighted": True,
+}
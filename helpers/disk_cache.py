@@ -0,0 +1,82 @@
+import os
+import hashlib
+import tempfile
+
+import numpy as np
+
+# Content addressed .npz cache for results that only depend on their inputs
+# ... (distance matrices, centers, generated graphs), shared by every run
+# ... and every process of a sweep
+# Least recently used entries are evicted once the directory grows past max_bytes
+
+
+def array_key(*arrays, **params):
+    # Hash of the arrays' bytes, shapes and dtypes and of the parameters
+    h = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        h.update("{}{}".format(array.dtype.str, array.shape).encode())
+        h.update(array.tobytes())
+    for name, value in sorted(params.items()):
+        h.update("{}={!r};".format(name, value).encode())
+    return h.hexdigest()
+
+
+class DiskCache():
+    def __init__(self, directory = ".cache", max_bytes = 256 * 2**20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def get(self, key):
+        '''
+        The arrays stored under `key` as a dict, or None.
+        A hit marks the entry as recently used.
+        '''
+        path = self.path(key)
+        try:
+            with np.load(path) as data:
+                entry = {name:data[name] for name in data.files}
+            os.utime(path)
+        except (FileNotFoundError, ValueError, OSError):
+            # Missing, evicted by another process or half written
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key, **arrays):
+        # Written to a temporary file and renamed, so readers never see part of an entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, self.path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".npz"): continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _,size,_ in entries)
+        # Oldest use first
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes: break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"): os.remove(os.path.join(self.directory, name))
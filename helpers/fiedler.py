@@ -1,15 +1,27 @@
 import numpy as np
+from structures.sparse_topology import SparseTopology
 
-# return the Fiedler value to show strong connection of the array
-def fiedler(adj_mat):
-    '''
-    Return the fiedler value, the second smallest
-    eigenvalue of the Laplacian.
-    Done by constructing a degree matrix from the 
-    adjacency matrix and calculating the Laplacian
-    and its eigenvalues.
-    '''
+# SciPy is only needed for the sparse solver on large graphs
+try:
+    import scipy.sparse as sparse
+    from scipy.sparse.linalg import eigsh, lobpcg
+except ImportError:
+    sparse = None
+
+# Graphs with at least this many nodes and at most this fraction
+# ... of possible edges use the sparse solver (if available)
+SPARSE_MIN_SIZE = 300
+SPARSE_MAX_DENSITY = 0.05
+# LOBPCG convergence, the constant vector (eigenvalue 0) is projected out
+# ... so the smallest eigenpair it finds is the Fiedler pair
+SPARSE_TOL = 1e-9
+SPARSE_MAX_ITER = 2000
+# Shift for shift-invert Lanczos ("shift_invert"), just below the 0 eigenvalue
+# ... so that L - sigma * I stays positive definite
+# ... needs a sparse LU factorisation, fast on meshes but slow on random graphs
+SPARSE_SHIFT = -1e-3
 
+def laplacian(adj_mat):
     # Calculate the row sum of the adjacency matrix
     # ... the row sum is the (out) degree of the node
     rowsum = adj_mat.sum(axis=1)
@@ -20,14 +32,76 @@ def fiedler(adj_mat):
     # The Laplacian is defined as 
     # ... the degree matrix minus the adjacency matrix
     # ... (L = D - M)
-    laplacian = degree_matrix - adj_mat
+    return degree_matrix - adj_mat
 
-    # Calculate the eigenvalues of the Laplacian
-    e_values, _ = np.linalg.eig(laplacian)
-    # Sort the eigenvalues
-    sorted_e_values = sorted(e_values)
-    # The Fiedler value is the second smallest eigenvalue of the Laplacian
-    return sorted_e_values[1]
+def choose_method(adj_mat):
+    V = len(adj_mat)
+    if sparse is None or V < SPARSE_MIN_SIZE: return "dense"
+    nnz = adj_mat.nnz() if isinstance(adj_mat, SparseTopology) else np.count_nonzero(adj_mat)
+    if nnz > SPARSE_MAX_DENSITY * V * V: return "dense"
+    return "sparse"
+
+# return the Fiedler value to show strong connection of the array
+def fiedler(adj_mat, method = "auto"):
+    '''
+    Return the fiedler value, the second smallest
+    eigenvalue of the Laplacian.
+    Done by constructing a degree matrix from the 
+    adjacency matrix and calculating the Laplacian
+    and its eigenvalues.
+    The Laplacian is symmetric, so `eigvalsh` is used for small graphs
+    and LOBPCG ("sparse") for large ones; "shift_invert" uses
+    shift-invert Lanczos (`eigsh`) instead.
+    '''
+    if method == "auto": method = choose_method(adj_mat)
+    if method == "dense":
+        if isinstance(adj_mat, SparseTopology): adj_mat = adj_mat.to_dense()
+        # Eigenvalues of a symmetric matrix, real and in ascending order
+        # The Fiedler value is the second smallest eigenvalue of the Laplacian
+        return np.linalg.eigvalsh(laplacian(adj_mat))[1]
+    return fiedler_vector(adj_mat, method)[0]
+
+def fiedler_vector(adj_mat, method = "auto", v0 = None):
+    '''
+    Return the Fiedler value and its eigenvector.
+    `v0` (e.g. the previous Fiedler vector) warm starts the sparse solver.
+    '''
+    if method == "auto": method = choose_method(adj_mat)
+    if method == "dense":
+        if isinstance(adj_mat, SparseTopology): adj_mat = adj_mat.to_dense()
+        e_values, e_vectors = np.linalg.eigh(laplacian(adj_mat))
+        return e_values[1], e_vectors[:, 1]
+    assert(sparse is not None and method in ["sparse", "shift_invert"])
+    adj = adj_mat.to_scipy().astype(float) if isinstance(adj_mat, SparseTopology) else sparse.csr_matrix(adj_mat, dtype=float)
+    degree = np.asarray(adj.sum(axis=1)).ravel()
+    lap = sparse.diags(degree) - adj
+    if method == "shift_invert":
+        # The two eigenvalues nearest the shift are 0 and the Fiedler value
+        e_values, e_vectors = eigsh(lap, k=2, sigma=SPARSE_SHIFT, which="LM", v0=v0)
+        order = np.argsort(e_values)
+        return e_values[order[1]], e_vectors[:, order[1]]
+    V = len(degree)
+    # Seeded start, so results are the same on every run
+    x = (v0 if v0 is not None else np.random.default_rng(0).standard_normal(V)).reshape(V, 1)
+    # Jacobi preconditioner, isolated nodes keep a weight of 1
+    preconditioner = sparse.diags(1 / np.maximum(degree, 1))
+    e_values, e_vectors = lobpcg(lap, x, M=preconditioner, Y=np.ones((V, 1)), largest=False, tol=SPARSE_TOL, maxiter=SPARSE_MAX_ITER)
+    return e_values[0], e_vectors[:, 0]
+
+class FiedlerSolver():
+    '''
+    Callable drop in for `fiedler` that remembers the last Fiedler
+    vector and warm starts the next solve with it; useful when the
+    graph only changes a little between calls (e.g. SpecifySmallStep).
+    '''
+    def __init__(self, method = "auto"):
+        self.method = method
+        self.vector = None
+
+    def __call__(self, adj_mat):
+        v0 = self.vector if self.vector is not None and len(self.vector) == len(adj_mat) else None
+        value, self.vector = fiedler_vector(adj_mat, self.method, v0)
+        return value
 
 def normalized_fiedler(adj_mat):
     '''
@@ -50,9 +124,7 @@ def normalized_fiedler(adj_mat):
     # L = I - A_n
     norm_laplacian = np.identity(len(adj_mat)) - norm_adj_mat
 
-    # Calculate the eigenvalues of the Laplacian
-    e_values, _ = np.linalg.eig(norm_laplacian)
-    # Sort the eigenvalues
-    sorted_e_values = sorted(e_values)
+    # Eigenvalues of the (symmetric) Laplacian, in ascending order
+    e_values = np.linalg.eigvalsh(norm_laplacian)
     # The Fiedler value is the second smallest eigenvalue of the Laplacian
-    return sorted_e_values[1]
\ No newline at end of file
+    return e_values[1]
\ No newline at end of file
@@ -7,40 +7,36 @@ from helpers.fiedler import fiedler, normalized_fiedler
 from data.formations import formations
 from helpers.get_edges import get_edges
 from helpers.print_graph import print_graph
-from algorithms.floyd_warshall import floydWarshall, floydWarshallCenter
 from algorithms.specify import SpecifySmallStep
 import random
-from structures.timed_communication_network import TimedNeighborCommunication, TimedBroadcastNode, TimedEnvironment, DynamicTimedEnvironment
-from structures.id_manager import IdManager
+from structures.timed_communication_network import DynamicTimedEnvironment
+from structures.simulation_session import SimulationSession
+from structures.instrumentation import Instrumentation
+import cProfile
 import pandas as pd
 import networkx as nx
 from helpers.mkdir_p import mkdir_p
 import matplotlib.ticker as plticker
-from algorithms.connected_components import subGraphs
 
 random.seed(12)
 INF  = 99999
+# Set by --instrument
+instrumentation = None
 
 
 def tie_breaker(leaders):
     if len(leaders) == 0: return -1
     return max(leaders)
 
-def recalibrate(env, manager, nodes):
-    def translate_id(leaders):
-        return [manager.get_index(id) for id in leaders]
+def recalibrate(session):
+    nodes = session.nodes
+    translate_id = session.translate_id
+
+    def record_state(session):
+        states.append((session.env.time,[tie_breaker(translate_id(node.leader)) for node in nodes]))
 
     states = []
-    t_steps = env.time
-    last_t_steps = t_steps
-    env.detect() 
-    while(len(env.packet_queue)):
-        # t_steps += 1
-        last_t_steps = t_steps
-        env.run()
-        t_steps = env.time
-        if last_t_steps != t_steps: 
-            states.append((t_steps,[tie_breaker(translate_id(node.leader)) for node in nodes]))
+    t_steps = session.recalibrate(on_step=record_state)
     states.append((t_steps,[tie_breaker(translate_id(node.leader)) for node in nodes]))
     print("lsp", list(nodes[3].flock_lsp))
     
@@ -103,7 +99,10 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--formation", type=int, help="enter a formation number/id",
                         nargs='?', default=0, const=0, choices=range(0, len(formations) + 1))
+    parser.add_argument("--profile", help="write a cProfile report of the simulations to this file (pstats, snakeviz, flameprof)")
+    parser.add_argument("--instrument", action="store_true", help="print per phase counts and CPU time of the simulator")
     args = parser.parse_args()
+    if args.instrument: instrumentation = Instrumentation()
 
     # To Create a Formation, add one to `formations.py`
     if args.formation == 0:
@@ -124,48 +123,33 @@ if __name__ == "__main__":
 
     # Preload classes to allow decision tree to make only once
 
-    def format_edge(graph,u,v):
-        if u == v: return 0
-        if graph[u][v]: return graph[u][v]
-        else: return INF
-    def format_graph(graph):
-        V = len(graph)
-        return [[format_edge(graph,i,j) for j in range(V)] for i in range(V)]
-
     def perform_test(formation, name, generate_figure = False):
         graph = formation["full"]
         # Setup flock
-        flock_size = len(graph)
-        nodes = [TimedBroadcastNode(flock_size) for i in range(flock_size)]
-        manager = IdManager(graph, nodes)
-        env = DynamicTimedEnvironment(graph, manager)
-        for node in nodes:
-            node.set_communicator(TimedNeighborCommunication(node.id, manager, env))
+        session = SimulationSession(graph, environment_class=DynamicTimedEnvironment, track_shortest_paths=True, instrumentation=instrumentation)
+        env, manager, nodes = session.env, session.manager, session.nodes
 
         # Fill routing table
-        for node in nodes:
-            node.setup()
-        true_states = [(0,[tie_breaker(floydWarshallCenter(format_graph(graph))[0])])]
+        session.setup()
+        true_states = [(0,[tie_breaker(env.shortest_paths.components()[0][1])])]
         states = [(0,[tie_breaker([manager.get_index(id) for id in node.leader]) for node in nodes])]
 
         for t, f_t in enumerate(formation["timeline"]):
             f_t(env)
 
-            # FW
+            # Ground truth, kept up to date by the environment
             true_centers, radiuses, diameters = [],[],[]
             true_centers_full = []
-            sub_graphs = subGraphs(env.adj_matrix)
-            for (graph_map,sub_graph) in sub_graphs:
-                formatted = format_graph(sub_graph)
-                center, radius, diameter = floydWarshallCenter(formatted)
-                true_centers.append(tie_breaker(list(graph_map[n] for n in center)))
-                true_centers_full.append(set(graph_map[n] for n in center))
+            components = env.shortest_paths.components()
+            for (component, center, radius, diameter) in components:
+                true_centers.append(tie_breaker(center))
+                true_centers_full.append(set(center))
                 radiuses.append(radius)
                 diameters.append(diameter)
 
             # Leader election
-            t_steps,new_states, predicted = recalibrate(env, manager, nodes)
-            predicted_res = [predicted[graph_map[0]] for (graph_map,_) in sub_graphs]
+            t_steps,new_states, predicted = recalibrate(session)
+            predicted_res = [predicted[component[0]] for (component,_,_,_) in components]
             for state_t,state_list in new_states:
                 true_states.append((state_t, true_centers))
             states += new_states
@@ -194,5 +178,13 @@ if __name__ == "__main__":
         if generate_figure: plot_states(states, true_states, save_name=name)
 
     alg_results = OrderedDict()
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler is not None: profiler.enable()
     for formation in forms:
         perform_test(formation, formation["name"], True)
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        print("Profile written to {}".format(args.profile))
+    if instrumentation is not None: print(instrumentation.report())
@@ -10,8 +10,10 @@ from helpers.print_graph import print_graph
 from algorithms.floyd_warshall import floydWarshall, floydWarshallCenter
 from algorithms.specify import SpecifySmallStep
 import random
-from structures.timed_communication_network import TimedNeighborCommunication, TimedBroadcastNode, TimedEnvironment
-from structures.id_manager import IdManager
+from structures.simulation_session import SimulationSession
+from structures.instrumentation import Instrumentation
+from helpers.disk_cache import DiskCache
+import cProfile
 import pandas as pd
 import networkx as nx
 from helpers.mkdir_p import mkdir_p
@@ -19,6 +21,10 @@ import matplotlib.ticker as plticker
 
 random.seed(12)
 INF  = 99999
+# Set by --instrument
+instrumentation = None
+# Set by --cache
+cache = None
 
 
 def tie_breaker(leaders):
@@ -27,29 +33,17 @@ def tie_breaker(leaders):
 
 def evaluate_noisy_broadcast(graph):
     # Setup flock
-    flock_size = len(graph)
-    nodes = [TimedBroadcastNode(flock_size) for i in range(flock_size)]
-    manager = IdManager(graph, nodes)
-    env = TimedEnvironment(graph, manager)
-    for node in nodes:
-        node.set_communicator(TimedNeighborCommunication(node.id, manager, env))
+    session = SimulationSession(graph, instrumentation=instrumentation)
+    manager, nodes = session.manager, session.nodes
+    translate_id = session.translate_id
 
-    def translate_id(leaders):
-        return [manager.get_index(id) for id in leaders]
+    def record_state(session):
+        states.append((session.env.time,[tie_breaker(translate_id(node.leader)) for node in nodes]))
 
     # Fill routing table
-    for node in nodes:
-        node.setup()
+    session.setup()
     states = [(0,[tie_breaker(translate_id(node.leader)) for node in nodes])]
-    t_steps = 0
-    last_t_steps = t_steps
-    while(len(env.packet_queue)):
-        # print("in process", sum(len(node.in_queue) for node in nodes))
-        last_t_steps = t_steps
-        env.run()
-        t_steps = env.time
-        if last_t_steps != t_steps: 
-            states.append((t_steps,[tie_breaker(translate_id(node.leader)) for node in nodes]))
+    t_steps = session.run(on_step=record_state)
     states.append((t_steps,[tie_breaker(translate_id(node.leader)) for node in nodes]))
     
     print("took t={} to complete broadcast and election".format(t_steps))
@@ -109,7 +103,13 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--formation", type=int, help="enter a formation number/id",
                         nargs='?', default=0, const=0, choices=range(0, len(formations) + 1))
+    parser.add_argument("--profile", help="write a cProfile report of the simulations to this file (pstats, snakeviz, flameprof)")
+    parser.add_argument("--instrument", action="store_true", help="print per phase counts and CPU time of the simulator")
+    parser.add_argument("--cache", help="directory to cache centers in")
+    parser.add_argument("--cache-mb", type=float, default=256, help="size bound of the cache, least recently used entries are evicted")
     args = parser.parse_args()
+    if args.instrument: instrumentation = Instrumentation()
+    if args.cache: cache = DiskCache(args.cache, int(args.cache_mb * 2**20))
 
     # To Create a Formation, add one to `formations.py`
     if args.formation == 0:
@@ -145,7 +145,7 @@ if __name__ == "__main__":
         formatted = format_graph(graph)
         # print("formatted")
         # print_graph(formatted)
-        center, radius, diameter = floydWarshallCenter(formatted)
+        center, radius, diameter = floydWarshallCenter(formatted, cache=cache)
         predicted, states = evaluate_noisy_broadcast(graph)
         result = ""
         # If not predicted any false and at least one element in predicted also in true
@@ -157,6 +157,15 @@ if __name__ == "__main__":
         if generate_figure: plot_states(states, tie_breaker(center), save_name=name)
 
     alg_results = OrderedDict()
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler is not None: profiler.enable()
     for formation in forms:
         for key in ["full", "tree"]:
             perform_test(formation[key], formation["name"] + " " + key, True)
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        print("Profile written to {}".format(args.profile))
+    if instrumentation is not None: print(instrumentation.report())
+
@@ -0,0 +1,99 @@
+import heapq
+import itertools
+from collections import deque
+
+# Event queues used by the environment to schedule packet arrivals
+# ... all backends pop in order of arrival time and break ties
+# ... in insertion order (FIFO), the same as `bisect.insort` on a list
+
+
+class HeapEventQueue():
+    '''
+    Binary heap keyed by (time_of_arrival, sequence).
+    The sequence is a monotonic counter so that events arriving
+    at the same time are popped in the order they were queued.
+    Push and pop are O(log n).
+    '''
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+
+    def push(self, item, time_of_arrival):
+        heapq.heappush(self._heap, (time_of_arrival, next(self._seq), item))
+
+    def pop(self):
+        return heapq.heappop(self._heap)[2]
+
+    def peek_time(self):
+        return self._heap[0][0]
+
+    def clear(self):
+        self._heap = []
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __iter__(self):
+        # Arrival order (not a destructive pop)
+        return (item for (_, _, item) in sorted(self._heap))
+
+
+class BucketEventQueue():
+    '''
+    Calendar (bucket) queue for integer link weights.
+    Events are stored in a FIFO bucket per arrival time; a heap only
+    holds the distinct pending times, so with small integer weights
+    nearly every push and pop is O(1).
+    '''
+    def __init__(self):
+        self._buckets = {}
+        self._times = []
+        self._size = 0
+
+    def push(self, item, time_of_arrival):
+        assert(time_of_arrival == int(time_of_arrival))
+        bucket = self._buckets.get(time_of_arrival)
+        if bucket is None:
+            bucket = self._buckets[time_of_arrival] = deque()
+            heapq.heappush(self._times, time_of_arrival)
+        bucket.append(item)
+        self._size += 1
+
+    def pop(self):
+        t = self._times[0]
+        bucket = self._buckets[t]
+        item = bucket.popleft()
+        if not bucket:
+            # Bucket drained, move on to the next pending time
+            heapq.heappop(self._times)
+            del self._buckets[t]
+        self._size -= 1
+        return item
+
+    def peek_time(self):
+        return self._times[0]
+
+    def clear(self):
+        self._buckets = {}
+        self._times = []
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for t in sorted(self._times):
+            for item in self._buckets[t]:
+                yield item
+
+
+event_queues = {
+    "heap": HeapEventQueue,
+    "bucket": BucketEventQueue,
+}
+
+def make_event_queue(backend = "heap"):
+    # Accept either a registered name or a queue class/factory
+    if callable(backend): return backend()
+    assert(backend in event_queues)
+    return event_queues[backend]()
@@ -5,12 +5,41 @@ class IdManager():
         for i in range(len(nodes)):
             nodes[i].id = i + 1
         if len(nodes) > 1: assert(nodes[0].id != nodes[1].id)
+        # index -> id (None for a retired slot) and id -> index
         self.ordered_ids = [node.id for node in nodes]
+        self.index_dict = {id:i for i,id in enumerate(self.ordered_ids)}
         self.node_dict = {node.id:node for node in nodes}
-    
+        # Ids are never reused, indices (rows of the adjacency matrix) are
+        self.next_id = len(nodes) + 1
+        self.free_indices = []
+
     def get_id(self, node_index):
         return self.ordered_ids[node_index]
-    
+
     # Private Methods
     def get_index(self, node_id):
-        return self.ordered_ids.index(node_id)
\ No newline at end of file
+        return self.index_dict[node_id]
+
+    def add_node(self, node):
+        # Give the node a fresh id and the lowest free index
+        # ... returns the index, which is len(ordered_ids) - 1 if the flock grew
+        node.id = self.next_id
+        self.next_id += 1
+        if len(self.free_indices):
+            self.free_indices.sort()
+            index = self.free_indices.pop(0)
+            self.ordered_ids[index] = node.id
+        else:
+            index = len(self.ordered_ids)
+            self.ordered_ids.append(node.id)
+        self.index_dict[node.id] = index
+        self.node_dict[node.id] = node
+        return index
+
+    def retire_node(self, node_id):
+        # Free the node's index for reuse, the id is not reused
+        index = self.index_dict.pop(node_id)
+        del self.node_dict[node_id]
+        self.ordered_ids[index] = None
+        self.free_indices.append(index)
+        return index
@@ -0,0 +1,74 @@
+import time
+
+
+def message_type(packet_meta):
+    if packet_meta.type == "timer": return "timer"
+    data = packet_meta.packet.data
+    return "route" if data is None else data["type"]
+
+def packet_type(packet, packet_meta = None):
+    return "route" if packet.data is None else packet.data["type"]
+
+
+class Instrumentation():
+    '''
+    Opt-in call counts and cumulative CPU time of the simulator's hot
+    paths (queue operations, packet processing, routing updates, lsp
+    handling, leader updates and neighbor scans), with per message type
+    histograms.
+    Installed by wrapping the methods of one environment and its nodes
+    as instance attributes, so runs without it pay nothing.
+    One instance can collect from any number of sessions.
+    Times are inclusive, e.g. `process` includes the `handle` it calls.
+    '''
+    def __init__(self):
+        # {phase: [calls, cpu seconds]}
+        self.phases = {}
+        # {phase: {message type: calls}}
+        self.message_types = {}
+
+    def wrap(self, obj, name, phase, classify = None):
+        original = getattr(obj, name)
+        stats = self.phases.setdefault(phase, [0, 0.0])
+        histogram = self.message_types.setdefault(phase, {}) if classify is not None else None
+        clock = time.process_time
+        def instrumented(*args):
+            if histogram is not None:
+                kind = classify(*args)
+                histogram[kind] = histogram.get(kind, 0) + 1
+            start = clock()
+            try:
+                return original(*args)
+            finally:
+                stats[0] += 1
+                stats[1] += clock() - start
+        setattr(obj, name, instrumented)
+
+    def attach_environment(self, env):
+        self.wrap(env, "run", "env.run")
+        self.wrap(env.packet_queue, "push", "queue.push")
+        self.wrap(env.packet_queue, "pop", "queue.pop")
+        return self
+
+    def attach_node(self, node):
+        # Only the methods the node class has
+        for name, classify in [("process", message_type), ("handle", packet_type), ("consider_routing_update", message_type), ("update_leader", None)]:
+            if hasattr(node, name): self.wrap(node, name, "node." + name, classify)
+        self.wrap(node.com, "get_neighbor_ids", "com.get_neighbor_ids")
+        return self
+
+    def attach(self, session):
+        self.attach_environment(session.env)
+        for node in session.nodes:
+            self.attach_node(node)
+        return self
+
+    def report(self):
+        lines = ["{:<32s}{:>12s}{:>12s}{:>12s}".format("Phase", "Calls", "CPU s", "us/call")]
+        for phase, (calls, seconds) in sorted(self.phases.items(), key=lambda item: -item[1][1]):
+            if not calls: continue
+            lines.append("{:<32s}{:>12d}{:>12.3f}{:>12.2f}".format(phase, calls, seconds, 1e6 * seconds / calls))
+        for phase, histogram in self.message_types.items():
+            if not len(histogram): continue
+            lines.append("{} by message type: {}".format(phase, ", ".join("{} {}".format(kind, calls) for kind,calls in sorted(histogram.items()))))
+        return "\n".join(lines)
@@ -0,0 +1,81 @@
+import heapq
+
+
+class LspTable():
+    '''
+    The flock's eccentricity table {node_id: (longest_shortest_path, timestamp)}
+    with a dict-like interface, indexed by lsp ({lsp: set of ids}) with a
+    lazy min-heap over the lsps, so the leaders (the ids with the smallest
+    lsp) are found in O(log V) instead of a scan of the table.
+    Also flags when the leader set may have changed, so nodes only
+    rebuild it then.
+    '''
+    def __init__(self):
+        self.entries = {}
+        self.ids_by_lsp = {}
+        # Each lsp at most once, may include lsps no longer in the table
+        self.lsp_heap = []
+        self.in_heap = set()
+        self.leaders_dirty = False
+
+    def _add(self, node_id, lsp):
+        self.ids_by_lsp.setdefault(lsp, set()).add(node_id)
+        if lsp not in self.in_heap:
+            self.in_heap.add(lsp)
+            heapq.heappush(self.lsp_heap, lsp)
+
+    def _remove(self, node_id, lsp):
+        ids = self.ids_by_lsp[lsp]
+        ids.discard(node_id)
+        if not len(ids): del self.ids_by_lsp[lsp]
+
+    def __contains__(self, node_id):
+        return node_id in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __getitem__(self, node_id):
+        return self.entries[node_id]
+
+    def __setitem__(self, node_id, entry):
+        old = self.entries.get(node_id)
+        smallest = self.smallest_lsp()
+        if old is not None:
+            self._remove(node_id, old[0])
+        self.entries[node_id] = entry
+        self._add(node_id, entry[0])
+        # The leader set only changes if the entry was or becomes one of the smallest
+        if (old is not None and old[0] == smallest) or entry[0] <= self.smallest_lsp():
+            self.leaders_dirty = True
+
+    def __delitem__(self, node_id):
+        lsp = self.entries.pop(node_id)[0]
+        if lsp == self.smallest_lsp(): self.leaders_dirty = True
+        self._remove(node_id, lsp)
+
+    def items(self):
+        return self.entries.items()
+
+    def values(self):
+        return self.entries.values()
+
+    def smallest_lsp(self):
+        # None if the table is empty
+        while len(self.lsp_heap) and self.lsp_heap[0] not in self.ids_by_lsp:
+            self.in_heap.discard(heapq.heappop(self.lsp_heap))
+        return self.lsp_heap[0] if len(self.lsp_heap) else None
+
+    def leaders(self):
+        # Ids with the smallest lsp, in ascending id order
+        smallest = self.smallest_lsp()
+        return [] if smallest is None else sorted(self.ids_by_lsp[smallest])
+
+    def pop_leaders_dirty(self):
+        # True (once) if the leader set may have changed since the last call
+        dirty = self.leaders_dirty
+        self.leaders_dirty = False
+        return dirty
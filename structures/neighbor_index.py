@@ -0,0 +1,55 @@
+from structures.sparse_topology import SparseTopology
+
+
+class NeighborIndex():
+    '''
+    Per node adjacency lists ({neighbor_index: weight}) kept next to the
+    adjacency matrix, so neighbor lookups are O(degree) instead of a
+    scan of a whole matrix row.
+    Also records which nodes had a link change since they last looked,
+    so nodes only rescan their neighbors when something changed.
+    '''
+    def __init__(self, adj_matrix):
+        V = len(adj_matrix)
+        if isinstance(adj_matrix, SparseTopology):
+            self.adj = [{j:w for j,w in adj_matrix.neighbors(i) if j != i} for i in range(V)]
+        else:
+            self.adj = [{j:w for j,w in enumerate(adj_matrix[i]) if w and j != i} for i in range(V)]
+        # Sorted (index, weight) lists, rebuilt lazily after a change
+        self._sorted = [None] * V
+        self.changed = set()
+
+    def neighbors(self, index):
+        # Ascending index order, the same order as scanning the matrix row
+        if self._sorted[index] is None:
+            self._sorted[index] = sorted(self.adj[index].items())
+        return self._sorted[index]
+
+    def weight(self, u, v):
+        return self.adj[u].get(v, 0)
+
+    def pop_changed(self, index):
+        # True (once) if the links of `index` changed since the last call
+        if index not in self.changed: return False
+        self.changed.discard(index)
+        return True
+
+    def edges_changed(self, changes):
+        for (u, v, old, new) in changes:
+            if u == v: continue
+            for (a, b) in ((u, v), (v, u)):
+                if new: self.adj[a][b] = new
+                else: self.adj[a].pop(b, None)
+                self._sorted[a] = None
+                self.changed.add(a)
+
+    def node_added(self, index):
+        # A reused index was left without links by node_retired
+        if index < len(self.adj): return
+        assert(index == len(self.adj))
+        self.adj.append({})
+        self._sorted.append(None)
+
+    def node_retired(self, index):
+        # Its links are already gone, there is no one left to detect them
+        self.changed.discard(index)
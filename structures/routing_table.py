@@ -0,0 +1,116 @@
+import heapq
+from array import array
+
+import numpy as np
+
+
+class RoutingTable():
+    '''
+    Routing table {target_id: (route_node, route_length, route_broadcast_timestamp)}
+    stored in parallel array columns indexed by node id, route_node is None
+    once a route has been cut.
+    Keeps a histogram of the lengths of live routes (route_node not None)
+    and a lazy max-heap over its keys, so the longest route, the node's
+    eccentricity, is O(log V) to maintain instead of a scan of the table.
+    '''
+    # route_node column value for None
+    NO_ROUTE = -1
+
+    def __init__(self, capacity = 16):
+        self.route_node = array('q', [self.NO_ROUTE]) * capacity
+        # Integer lengths until a fractional one is stored, then widened to floats
+        self.route_length = array('q', [0]) * capacity
+        self.timestamp = array('q', [0]) * capacity
+        self.present = bytearray(capacity)
+        # Targets in insertion order, the order a dict would iterate in
+        self.order = []
+        # {route_length: number of live routes with it}
+        self.length_counts = {}
+        # Negated lengths, each at most once, may include lengths no longer counted
+        self.length_heap = []
+        self.in_heap = set()
+
+    def _grow(self, target):
+        extra = max(len(self.present), target + 1 - len(self.present))
+        self.route_node.extend(array('q', [self.NO_ROUTE]) * extra)
+        self.route_length.extend(array(self.route_length.typecode, [0]) * extra)
+        self.timestamp.extend(array('q', [0]) * extra)
+        self.present.extend(bytearray(extra))
+
+    def _count(self, length, step):
+        count = self.length_counts.get(length, 0) + step
+        if count: self.length_counts[length] = count
+        else: del self.length_counts[length]
+        if step > 0 and length not in self.in_heap:
+            self.in_heap.add(length)
+            heapq.heappush(self.length_heap, -length)
+
+    def __contains__(self, target):
+        return target < len(self.present) and self.present[target] == 1
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, target):
+        if target not in self: raise KeyError(target)
+        route_node = self.route_node[target]
+        return (None if route_node == self.NO_ROUTE else route_node, self.route_length[target], self.timestamp[target])
+
+    def __setitem__(self, target, route):
+        route_node, route_length, timestamp = route
+        if target >= len(self.present): self._grow(target)
+        if self.present[target]:
+            if self.route_node[target] != self.NO_ROUTE: self._count(self.route_length[target], -1)
+        else:
+            self.present[target] = 1
+            self.order.append(target)
+        try:
+            self.route_length[target] = route_length
+        except TypeError:
+            self.route_length = array('d', self.route_length)
+            self.route_length[target] = route_length
+        route_length = self.route_length[target]
+        self.route_node[target] = self.NO_ROUTE if route_node is None else route_node
+        self.timestamp[target] = timestamp
+        if route_node is not None: self._count(route_length, 1)
+
+    def items(self):
+        return [(target, self[target]) for target in self.order]
+
+    def routes(self):
+        # Items with a live route
+        return [(target, route) for target,route in self.items() if route[0] is not None]
+
+    def has_routes(self):
+        return len(self.length_counts) > 0
+
+    def longest_route(self):
+        # Length of the longest live route, None if there are none
+        while len(self.length_heap) and -self.length_heap[0] not in self.length_counts:
+            self.in_heap.discard(-heapq.heappop(self.length_heap))
+        return -self.length_heap[0] if len(self.length_heap) else None
+
+    def to_dict(self):
+        return dict(self.items())
+
+
+def pack_routes(routes):
+    '''
+    Routes [(target_id, (route_node, route_length, route_broadcast_timestamp))]
+    as NumPy columns (targets, route_nodes, route_lengths, timestamps) for
+    sending, route_node None as RoutingTable.NO_ROUTE.
+    '''
+    targets = np.array([target for target,_ in routes], dtype=np.int32)
+    route_nodes = np.array([RoutingTable.NO_ROUTE if route[0] is None else route[0] for _,route in routes], dtype=np.int32)
+    route_lengths = np.array([route[1] for _,route in routes])
+    # Integer lengths fit in 32 bits as well
+    if route_lengths.dtype.kind in "iu": route_lengths = route_lengths.astype(np.int32)
+    timestamps = np.array([route[2] for _,route in routes], dtype=np.int32)
+    return (targets, route_nodes, route_lengths, timestamps)
+
+def route_entries(table):
+    # [(target_id, route)] of a sent table, a dict or packed by pack_routes
+    if isinstance(table, dict): return table.items()
+    targets, route_nodes, route_lengths, timestamps = (column.tolist() for column in table)
+    return [(target, (None if route_node == RoutingTable.NO_ROUTE else route_node, route_length, timestamp))
+            for target, route_node, route_length, timestamp in zip(targets, route_nodes, route_lengths, timestamps)]
@@ -0,0 +1,136 @@
+import numpy as np
+
+from structures.id_manager import IdManager
+from structures.sparse_topology import SparseTopology
+from structures.timed_communication_network import TimedNeighborCommunication, TimedBroadcastNode, TimedEnvironment
+
+
+class SimulationSession():
+    '''
+    Owns everything one election needs: the environment, the id
+    manager, the nodes and their communicators.
+    Sessions share no state, so any number of them can be built
+    and run side by side (serially, in threads or in processes).
+    '''
+    def __init__(self, graph, environment_class = TimedEnvironment, node_class = TimedBroadcastNode, event_queue = "heap", node_args = None, instrumentation = None, **environment_args):
+        # Copy so that dynamic environments do not mutate the caller's graph
+        # ... (or the graph of another session built from the same formation)
+        self.graph = graph.copy() if isinstance(graph, SparseTopology) else np.array(graph)
+        flock_size = len(self.graph)
+        self.node_class = node_class
+        # Extra arguments for every node (e.g. `batch_window`)
+        self.node_args = node_args or {}
+        self.nodes = [node_class(flock_size, **self.node_args) for i in range(flock_size)]
+        self.manager = IdManager(self.graph, self.nodes)
+        # Extra arguments go to the environment (e.g. `track_shortest_paths`)
+        self.env = environment_class(self.graph, self.manager, event_queue, **environment_args)
+        self.communicators = []
+        for node in self.nodes:
+            com = TimedNeighborCommunication(node.id, self.manager, self.env)
+            node.set_communicator(com)
+            self.communicators.append(com)
+        # Optional Instrumentation (structures/instrumentation.py) collecting hot path timings
+        self.instrumentation = instrumentation
+        if instrumentation is not None: instrumentation.attach(self)
+
+    def translate_id(self, leaders):
+        return [self.manager.get_index(id) for id in leaders]
+
+    def leaders(self):
+        # Leader (index) set selected by each node
+        return [set(self.translate_id(node.leader)) for node in self.nodes]
+
+    def setup(self):
+        # Fill routing table
+        for node in self.nodes:
+            node.setup()
+        return self
+
+    def run(self, on_step = None):
+        '''
+        Deliver packets until the network is quiet.
+        `on_step(session)` is called each time the clock advances.
+        Returns the time at which the last packet arrived.
+        '''
+        return self._drain(self.env.time, on_step)
+
+    def recalibrate(self, on_step = None):
+        # Let nodes detect topology changes, then run to quiescence
+        t_steps = self.env.time
+        self.env.detect()
+        return self._drain(t_steps, on_step)
+
+    def _drain(self, t_steps, on_step):
+        while(len(self.env.packet_queue)):
+            last_t_steps = t_steps
+            self.env.run()
+            t_steps = self.env.time
+            if on_step is not None and last_t_steps != t_steps:
+                on_step(self)
+        return t_steps
+
+    def add_node(self):
+        # A node joining at runtime (needs a DynamicTimedEnvironment)
+        # ... it starts with no links, add edges then recalibrate
+        node = self.node_class(len(self.nodes) + 1, **self.node_args)
+        self.env.add_node(node)
+        com = TimedNeighborCommunication(node.id, self.manager, self.env)
+        node.set_communicator(com)
+        self.nodes.append(node)
+        self.communicators.append(com)
+        if self.instrumentation is not None: self.instrumentation.attach_node(node)
+        node.setup()
+        return node
+
+    def retire_node(self, node_id):
+        # A node leaving at runtime, its links are removed
+        node = self.manager.node_dict[node_id]
+        self.env.retire_node(node_id)
+        i = self.nodes.index(node)
+        del self.nodes[i]
+        del self.communicators[i]
+        return self
+
+    def packets_sent(self):
+        return sum(node.packets_sent for node in self.nodes)
+
+    def bytes_sent(self):
+        # Estimated wire size, needs `measure_payloads=True`
+        assert(self.env.measure_payloads)
+        return sum(com.bytes_sent for com in self.communicators)
+
+    def payload_sizes(self):
+        # {packet type: (packets sent, bytes sent, bytes per packet)}, needs `measure_payloads=True`
+        assert(self.env.measure_payloads)
+        totals = {}
+        for com in self.communicators:
+            for kind,(packets, size) in com.sent_by_type.items():
+                total = totals.setdefault(kind, [0, 0])
+                total[0] += packets
+                total[1] += size
+        return {kind:(packets, size, size / packets) for kind,(packets, size) in totals.items()}
+
+    def lsp_announcements(self):
+        return sum(node.lsp_announcements for node in self.nodes)
+
+    def packets_processed(self):
+        return sum(node.packets_processed for node in self.nodes)
+
+
+def run_election(graph, **session_args):
+    # Top level so that it can be shipped to a process pool
+    session = SimulationSession(graph, **session_args).setup()
+    t_steps = session.run()
+    return session.leaders(), t_steps, session.packets_sent()
+
+def run_elections(graphs, executor = None, **session_args):
+    '''
+    Run an independent static election for each graph.
+    With an executor (thread or process pool) the elections run in
+    parallel; results are returned in the order of `graphs` as
+    (leaders per node, time to converge, packets sent) tuples.
+    '''
+    if executor is None:
+        return [run_election(graph, **session_args) for graph in graphs]
+    futures = [executor.submit(run_election, graph, **session_args) for graph in graphs]
+    return [future.result() for future in futures]
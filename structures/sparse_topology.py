@@ -0,0 +1,165 @@
+import numpy as np
+
+# SciPy is only needed to hand the topology to SciPy solvers
+try:
+    import scipy.sparse as sparse
+except ImportError:
+    sparse = None
+
+
+class SparseTopologyRow():
+    # Lets `topology[u][v]` read and write like a row of an adjacency matrix
+    def __init__(self, topology, u):
+        self.topology = topology
+        self.u = u
+
+    def __getitem__(self, v):
+        return self.topology.get(self.u, v)
+
+    def __setitem__(self, v, w):
+        self.topology.set(self.u, v, w)
+
+    def __len__(self):
+        return len(self.topology)
+
+    def __iter__(self):
+        # Dense iteration, O(V), prefer `topology.neighbors(u)`
+        row = [0] * len(self.topology)
+        for v,w in self.topology.neighbors(self.u):
+            row[v] = w
+        return iter(row)
+
+
+class SparseTopology():
+    '''
+    Weighted adjacency (0 = no edge) whose memory grows with the number
+    of edges instead of V^2.
+    Edges live in a CSR snapshot (indptr, indices, data) plus a mutable
+    dict-of-dicts overlay of changes since the snapshot; the overlay is
+    folded into a new snapshot once it grows past a fraction of the edges.
+    Can be used wherever an adjacency matrix is indexed as `g[u][v]`.
+    '''
+    # Compact once the overlay holds more than this fraction of the snapshot
+    COMPACT_RATIO = 0.25
+
+    def __init__(self, V, indptr = None, indices = None, data = None):
+        self.V = V
+        self.indptr = np.zeros(V + 1, dtype=np.int64) if indptr is None else indptr
+        self.indices = np.zeros(0, dtype=np.int64) if indices is None else indices
+        self.data = np.zeros(0, dtype=np.int64) if data is None else data
+        # {u: {v: w}}, w = 0 marks an edge removed since the snapshot
+        self.overlay = {}
+        self.overlay_size = 0
+
+    @classmethod
+    def from_dense(cls, adj_matrix):
+        adj = np.asarray(adj_matrix)
+        rows, cols = np.nonzero(adj)
+        indptr = np.zeros(len(adj) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(adj)), out=indptr[1:])
+        return cls(len(adj), indptr, cols.astype(np.int64), adj[rows, cols])
+
+    @classmethod
+    def from_edges(cls, V, edges):
+        # Undirected (u, v, w) edges
+        if not len(edges): return cls(V)
+        us, vs, ws = (np.array(column) for column in zip(*edges))
+        rows, cols, data = np.concatenate([us, vs]), np.concatenate([vs, us]), np.concatenate([ws, ws])
+        order = np.lexsort((cols, rows))
+        indptr = np.zeros(V + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=V), out=indptr[1:])
+        return cls(V, indptr, cols[order].astype(np.int64), data[order])
+
+    def __len__(self):
+        return self.V
+
+    def __getitem__(self, u):
+        return SparseTopologyRow(self, u)
+
+    def _snapshot_get(self, u, v):
+        start, end = self.indptr[u], self.indptr[u + 1]
+        i = start + np.searchsorted(self.indices[start:end], v)
+        if i < end and self.indices[i] == v: return self.data[i]
+        return 0
+
+    def get(self, u, v):
+        row = self.overlay.get(u)
+        if row is not None and v in row: return row[v]
+        return self._snapshot_get(u, v)
+
+    def set(self, u, v, w):
+        # Directed write, callers set both directions (as with a matrix)
+        row = self.overlay.setdefault(u, {})
+        if v not in row: self.overlay_size += 1
+        row[v] = w
+        # Integer weights until a fractional one is stored, then widened to floats
+        # ... so compacting the overlay never truncates it
+        if self.data.dtype.kind in "iub" and w != int(w):
+            self.data = self.data.astype(np.float64)
+        if self.overlay_size > 64 + self.COMPACT_RATIO * len(self.indices):
+            self.compact()
+
+    def neighbors(self, u):
+        # [(v, w)] in ascending v
+        start, end = self.indptr[u], self.indptr[u + 1]
+        row = dict(zip(self.indices[start:end].tolist(), self.data[start:end]))
+        if u in self.overlay: row.update(self.overlay[u])
+        return sorted((v, w) for v,w in row.items() if w)
+
+    def adjacency_lists(self):
+        return [self.neighbors(u) for u in range(self.V)]
+
+    def edges(self):
+        # Undirected edges, u < v
+        return [(u, v, w) for u in range(self.V) for v,w in self.neighbors(u) if u < v]
+
+    def nnz(self):
+        return sum(len(self.neighbors(u)) for u in range(self.V)) if self.overlay_size else len(self.indices)
+
+    def compact(self):
+        # Fold the overlay into a fresh snapshot
+        if not self.overlay_size: return
+        rows = [self.neighbors(u) for u in range(self.V)]
+        self.indptr = np.zeros(self.V + 1, dtype=np.int64)
+        np.cumsum([len(row) for row in rows], out=self.indptr[1:])
+        self.indices = np.array([v for row in rows for v,_ in row], dtype=np.int64)
+        self.data = np.array([w for row in rows for _,w in row], dtype=self.data.dtype)
+        self.overlay = {}
+        self.overlay_size = 0
+
+    def add_vertex(self):
+        # New isolated vertex at index V
+        self.indptr = np.append(self.indptr, self.indptr[-1])
+        self.V += 1
+        return self.V - 1
+
+    def copy(self):
+        topology = SparseTopology(self.V, self.indptr.copy(), self.indices.copy(), self.data.copy())
+        topology.overlay = {u:row.copy() for u,row in self.overlay.items()}
+        topology.overlay_size = self.overlay_size
+        return topology
+
+    def subgraph(self, component):
+        # Topology induced by the sorted list of vertices `component`
+        new_index = {n:i for i,n in enumerate(component)}
+        edges = [(new_index[u], new_index[v], w) for u in component for v,w in self.neighbors(u) if v in new_index and u < v]
+        return SparseTopology.from_edges(len(component), edges)
+
+    def to_scipy(self):
+        assert(sparse is not None)
+        self.compact()
+        return sparse.csr_matrix((self.data, self.indices, self.indptr), shape=(self.V, self.V))
+
+    def to_dense(self):
+        adj = np.zeros((self.V, self.V), dtype=self.data.dtype)
+        for u in range(self.V):
+            for v,w in self.neighbors(u):
+                adj[u][v] = w
+        return adj
+
+    def formatted(self, inf):
+        # INF padded matrix, as expected by floydWarshall (dense, O(V^2))
+        adj = self.to_dense()
+        formatted = np.where(adj > 0, adj, inf)
+        np.fill_diagonal(formatted, 0)
+        return formatted
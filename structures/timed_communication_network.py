@@ -1,38 +1,59 @@
-import time
-import bisect 
+import itertools
 import numpy as np
 
 from structures.id_manager import IdManager
-
-
-packet_id_inc = 1
+from structures.event_queue import make_event_queue
+from structures.neighbor_index import NeighborIndex
+from structures.routing_table import RoutingTable, pack_routes, route_entries
+from structures.lsp_table import LspTable
+from structures.sparse_topology import SparseTopology
+from algorithms.dynamic_apsp import DynamicAPSP
+from algorithms.dynamic_connectivity import DynamicConnectivity
+
+
+# Packet ids only need to be unique, so one counter is shared
+# ... (next() on a count is atomic, so this is safe across threads)
+packet_ids = itertools.count(1)
 class Packet():
+    # Slotted, a broadcast creates one packet per hop
+    __slots__ = ("id", "created_at", "data", "source_id", "target_id", "t_in_transit", "local_update_counter")
     type = "packet"
-    def __init__(self, data, source_id, target_id):
-        global packet_id_inc
-        self.id = packet_id_inc
-        packet_id_inc += 1
+    def __init__(self, data, source_id, target_id, created_at):
+        self.id = next(packet_ids)
 
-        self.created_at = time.time()
+        # Logical timestamp from the environment's clock (see TimedEnvironment.timestamp)
+        self.created_at = created_at
+        # The payload is shared by every clone (hop) of the packet
+        # ... so it must never be mutated, build a new one instead
         self.data = data
 
         self.source_id = source_id
         self.target_id = target_id
-    
-    # Can also be switched to time in transit 
-    # ... (sum of time being communicated, not including processing)
-    t_in_transit = 0
+
+        # Per hop fields, copied (not shared) by clone
+        # Can also be switched to time in transit 
+        # ... (sum of time being communicated, not including processing)
+        self.t_in_transit = 0
+        self.local_update_counter = 0
+
     def inc(self, weight = 1):
         self.t_in_transit += weight
 
-    def clone(self):
-        packet_copy = Packet(self.data, self.source_id, self.target_id)
+    def clone(self, packet_copy = None):
+        # Copy into `packet_copy` (e.g. recycled by a PacketPool) or a new packet
+        # ... skips __init__, keeps the original's creation timestamp
+        if packet_copy is None: packet_copy = Packet.__new__(Packet)
+        packet_copy.id = next(packet_ids)
         packet_copy.created_at = self.created_at
+        packet_copy.data = self.data
+        packet_copy.source_id = self.source_id
+        packet_copy.target_id = self.target_id
         packet_copy.t_in_transit = self.t_in_transit
         packet_copy.local_update_counter = self.local_update_counter
         return packet_copy
 
 class PacketMeta():
+    __slots__ = ("packet", "from_id", "to_id", "time_of_arrival")
     type = "meta"
     def __init__(self, packet, from_id, to_id):
         self.packet = packet
@@ -40,99 +61,312 @@ class PacketMeta():
         self.to_id = to_id
         # Meta assigned by env and includes when the packet arrives
         # according to when sent and link weight
+        self.time_of_arrival = None
         
     def set_arrival(self, time_of_arrival):
         self.time_of_arrival = time_of_arrival
     
     def __lt__(self, other):
-        # For bisect
+        # For sorting outside of the event queue
         return self.time_of_arrival < other.time_of_arrival
 
     def unwrap(self):
         return self.packet
 
+class TimerMeta():
+    # Queued like a packet, wakes node `to_id` at `time_of_arrival`
+    __slots__ = ("to_id", "time_of_arrival")
+    type = "timer"
+    def __init__(self, to_id, time_of_arrival):
+        self.to_id = to_id
+        self.time_of_arrival = time_of_arrival
+
+# Estimated wire size, for comparing protocols: a fixed header
+# ... (id, source, target, created_at, local_update_counter)
+# ... plus 8 bytes per number and 1 per type tag in the payload
+PACKET_HEADER_BYTES = 40
+def payload_size(value):
+    if value is None: return 0
+    if isinstance(value, Packet): return packet_size(value)
+    if isinstance(value, np.ndarray): return value.nbytes
+    if isinstance(value, str): return 1
+    if isinstance(value, dict): return sum(payload_size(k) + payload_size(v) for k,v in value.items())
+    if isinstance(value, (list, tuple)): return sum(payload_size(v) for v in value)
+    return 8
+
+def packet_size(packet):
+    return PACKET_HEADER_BYTES + payload_size(packet.data)
+
+
+class PacketPool():
+    '''
+    Free list of packets and metas.
+    With `recycle`, the environment hands back every delivered packet
+    and meta once the receiving node has processed it, and sends reuse
+    them instead of allocating. Also counts allocations either way.
+    Nodes must not keep a reference to a packet after `process`.
+    '''
+    def __init__(self, recycle = False):
+        self.recycle = recycle
+        self.packets = []
+        self.metas = []
+        self.allocated = 0
+        self.reused = 0
+
+    def clone(self, packet):
+        if self.recycle and len(self.packets):
+            self.reused += 1
+            return packet.clone(self.packets.pop())
+        self.allocated += 1
+        return packet.clone()
+
+    def meta(self, packet, from_id, to_id):
+        if self.recycle and len(self.metas):
+            self.reused += 1
+            packet_meta = self.metas.pop()
+            PacketMeta.__init__(packet_meta, packet, from_id, to_id)
+            return packet_meta
+        self.allocated += 1
+        return PacketMeta(packet, from_id, to_id)
+
+    def release(self, packet_meta):
+        if not self.recycle: return
+        packet = packet_meta.packet
+        # Drop references so payloads can be freed
+        packet.data = None
+        packet_meta.packet = None
+        self.packets.append(packet)
+        self.metas.append(packet_meta)
+
 
 
 
 class TimedEnvironment():
-    packet_queue = []
-    time = 0
-    def __init__(self, adj_matrix, manager):
+    def __init__(self, adj_matrix, manager, event_queue = "heap", recycle_packets = False, record_leader_changes = False, measure_payloads = False):
         self.manager = manager
         self.adj_matrix = adj_matrix
+        # All simulation state is per instance
+        # ... so environments never share a clock or queue
+        self.time = 0
+        # Logical clock for packet and routing timestamps
+        # ... a sequence shared by the whole simulation, so every stamp is unique,
+        # ... ordered by creation and the same on every machine
+        self.clock = itertools.count(1)
+        # Pending arrivals, ordered by time of arrival then by send order
+        # ... "heap" works for any weights, "bucket" is faster for integer weights
+        self.packet_queue = make_event_queue(event_queue)
+        # Adjacency lists for O(degree) neighbor lookups
+        # ... the topology must only be changed through DynamicTimedEnvironment
+        self.neighbor_index = NeighborIndex(adj_matrix)
+        # Allocates (and optionally recycles) packets in flight
+        self.packet_pool = PacketPool(recycle_packets)
+        # [(time, node_id, leader)], one per change of a node's leader set
+        self.leader_changes = [] if record_leader_changes else None
+        # Whether communicators add up the estimated wire size of what they send
+        # ... sizing walks the whole payload, so it is off unless asked for
+        self.measure_payloads = measure_payloads
+        # Events (packet arrivals and timers) handled so far
+        self.events = 0
 
     def run(self):
-        packet_meta = self.packet_queue.pop(0)
+        packet_meta = self.packet_queue.pop()
+        self.events += 1
         # fast forward time until time of next arrival
         self.time = packet_meta.time_of_arrival
-        self.manager.node_dict[packet_meta.to_id].process(packet_meta)
+        node = self.manager.node_dict.get(packet_meta.to_id)
+        if node is None:
+            # Addressed to a retired node (ids are never reused), dropped
+            if packet_meta.type != "timer": self.packet_pool.release(packet_meta)
+            return
+        if packet_meta.type == "timer":
+            node.on_timer()
+            return
+        if packet_meta.from_id not in self.manager.node_dict:
+            # Still in flight when its sender retired, the link it came over is gone
+            self.packet_pool.release(packet_meta)
+            return
+        node.process(packet_meta)
+        self.packet_pool.release(packet_meta)
     
     def detect(self):
         # No packets recieved here, but work done so increment clock
         self.time += 1
-        for bot in self.manager.node_dict.values():
-            bot.detect()
+        # Only nodes whose links changed have anything to detect
+        # ... woken in id order, the order of node_dict
+        ids = [self.manager.get_id(index) for index in self.neighbor_index.changed]
+        for id in sorted(id for id in ids if id is not None):
+            self.manager.node_dict[id].detect()
 
     def queue(self, packet_meta, time_in_travel):
         packet_meta.set_arrival(time_in_travel + self.time)
-        bisect.insort(self.packet_queue, packet_meta)
+        self.packet_queue.push(packet_meta, packet_meta.time_of_arrival)
+
+    def schedule(self, node_id, delay):
+        # Call `on_timer` of the node `delay` from now
+        timer = TimerMeta(node_id, self.time + delay)
+        self.packet_queue.push(timer, timer.time_of_arrival)
+
+    def timestamp(self):
+        return next(self.clock)
+
+    def leader_changed(self, node_id, leader):
+        if self.leader_changes is not None:
+            self.leader_changes.append((self.time, node_id, leader))
 
 
 class TimedNeighborCommunication(IdManager):
-    packets_sent = 0
     def __init__(self, current_id, manager, env):
         self.manager = manager
         self.env = env
         self._current_id = current_id
+        self.packets_sent = 0
+        # Only counted with `measure_payloads`
+        self.bytes_sent = 0
+        # {packet type: [packets, bytes]}, "route" for the data-less route broadcasts
+        # ... also only kept with `measure_payloads`
+        self.sent_by_type = {}
 
     def send(self, node_id, packet):
         assert(node_id != self._current_id)
         u, v = self.manager.get_index(self._current_id), self.manager.get_index(node_id)
-        assert(self.env.adj_matrix[u][v] > 0)
-        if self.env.adj_matrix[u][v]:
+        weight = self.env.neighbor_index.weight(u, v)
+        assert(weight > 0)
+        if weight:
             self.packets_sent += 1
+            if self.env.measure_payloads:
+                size = packet_size(packet)
+                self.bytes_sent += size
+                sent = self.sent_by_type.setdefault("route" if packet.data is None else packet.data["type"], [0, 0])
+                sent[0] += 1
+                sent[1] += size
             # HAVE TO CLONE to keep t_in_transit accurate.
-            packet = packet.clone()
+            packet = self.env.packet_pool.clone(packet)
             # Higher weight means more travel time
-            time_in_travel = self.env.adj_matrix[u][v]
+            time_in_travel = weight
             packet.inc(time_in_travel) # Inc t_in_transit proportional to weight of edge
-            self.env.queue(PacketMeta(packet, self._current_id, node_id), time_in_travel)
+            self.env.queue(self.env.packet_pool.meta(packet, self._current_id, node_id), time_in_travel)
         
     def get_neighbor_ids(self):
         node_index = self.manager.get_index(self._current_id)
         # Get edges
-        neighbors_indexes = [(i,w) for i,w in enumerate(self.env.adj_matrix[node_index]) if w and i != node_index]
+        neighbors_indexes = self.env.neighbor_index.neighbors(node_index)
         # Return ids for edges
         neighbors_ids = [(self.manager.get_id(i),w) for i,w in neighbors_indexes]
         return neighbors_ids
 
+    def timestamp(self):
+        return self.env.timestamp()
+
+    def leader_changed(self, leader):
+        self.env.leader_changed(self._current_id, leader)
+
+    def schedule(self, delay):
+        self.env.schedule(self._current_id, delay)
+
+    def neighbors_changed(self):
+        # Whether this node's links changed since it last asked
+        return self.env.neighbor_index.pop_changed(self.manager.get_index(self._current_id))
+
 class DynamicTimedEnvironment(TimedEnvironment):
+    def __init__(self, adj_matrix, manager, event_queue = "heap", track_shortest_paths = False, recycle_packets = False, record_leader_changes = False, track_connectivity = False, measure_payloads = False):
+        TimedEnvironment.__init__(self, adj_matrix, manager, event_queue, recycle_packets, record_leader_changes, measure_payloads)
+        # Structures told about every change to the topology
+        # ... each has `edges_changed([(u, v, old_weight, new_weight)])`,
+        # ... `node_added(index)` (a new or reused index) and `node_retired(index)`
+        self.trackers = [self.neighbor_index]
+        self.shortest_paths = None
+        if track_shortest_paths:
+            self.shortest_paths = DynamicAPSP(adj_matrix)
+            self.trackers.append(self.shortest_paths)
+        # Connected components with split/merge events, much cheaper than shortest paths
+        self.connectivity = None
+        if track_connectivity:
+            self.connectivity = DynamicConnectivity(adj_matrix)
+            self.trackers.append(self.connectivity)
+
     # Main Data Public Methods
     def remove_edge(self, u, v):
-        self.adj_matrix[u][v] = 0
-        self.adj_matrix[v][u] = 0
-        return self
+        return self.set_edges([(u, v, 0)])
     def remove_edges(self, edges):
-        for (u,v) in edges:
-            self.remove_edge(u,v)
-        return self
+        return self.set_edges([(u, v, 0) for (u,v) in edges])
     def remove_all_edges(self, node_index):
-        for id in range(len(self.adj_matrix)):
-            if node_index != id:
-                self.remove_edge(node_index, id)
-        return self
+        # Only current links can be removed, so no need to scan the whole row
+        return self.set_edges([(node_index, id, 0) for id,_ in self.neighbor_index.neighbors(node_index)])
     def add_edge(self, u, v, w = 1):
-        self.adj_matrix[u][v] = w
-        self.adj_matrix[v][u] = w
-        return self
+        return self.set_edges([(u, v, w)])
     def add_edges(self, edges, w = 1):
-        for (u,v) in edges:
-            self.add_edge(u,v)
-        return self
+        return self.set_edges([(u, v, w) for (u,v) in edges])
     def add_all_edges(self, node_index, w = 1):
-        for id in range(len(self.adj_matrix)):
-            if node_index != id:
-                self.add_edge(node_index, id)
+        # Every other live node, indices freed by retire_node have no one to link to
+        return self.set_edges([(node_index, i, w) for i in range(len(self.adj_matrix)) if node_index != i and self.manager.get_id(i) is not None])
+    def apply_edge_diff(self, added = [], removed = [], reweighted = [], w = 1):
+        '''
+        Apply a whole step of changes as one batch: `added` (u, v) or
+        (u, v, weight) edges (weight `w` if not given), `removed` (u, v)
+        edges and `reweighted` (u, v, weight) edges.
+        '''
+        edges = [(e[0], e[1], e[2] if len(e) > 2 else w) for e in added]
+        edges += [(u, v, 0) for (u,v) in removed]
+        edges += list(reweighted)
+        return self.set_edges(edges)
+
+    def add_node(self, node):
+        # Register a new node, growing the topology if no index is free
+        index = self.manager.add_node(node)
+        if index == len(self.adj_matrix):
+            if isinstance(self.adj_matrix, SparseTopology): self.adj_matrix.add_vertex()
+            else: self.adj_matrix = np.pad(self.adj_matrix, ((0,1),(0,1)))
+        for tracker in self.trackers:
+            tracker.node_added(index)
+        return index
+    def retire_node(self, node_id):
+        # Disconnect the node and free its index for a later add_node
+        # ... packets and timers still queued for it are dropped by run()
+        index = self.manager.get_index(node_id)
+        self.remove_all_edges(index)
+        self.manager.retire_node(node_id)
+        # Vacant until add_node reuses it, trackers leave it out meanwhile
+        for tracker in self.trackers:
+            tracker.node_retired(index)
+        return self
+
+    def set_edges(self, edges):
+        # Apply (u, v, weight) edits as one batch, weight 0 removes the edge
+        # ... both ends must be live, a retired node's index is vacant until add_node reuses it
+        assert(all(self.manager.get_id(u) is not None and self.manager.get_id(v) is not None for (u, v, _) in edges))
+        if isinstance(self.adj_matrix, np.ndarray) and len(edges) > 1:
+            return self._set_edges_dense(edges)
+        changes = []
+        for (u, v, w) in edges:
+            old = self.adj_matrix[u][v]
+            self.adj_matrix[u][v] = w
+            self.adj_matrix[v][u] = w
+            # Read back, so trackers see the weight as stored (e.g. cast to int)
+            w = self.adj_matrix[u][v]
+            if old != w: changes.append((u, v, old, w))
+        if len(changes):
+            for tracker in self.trackers:
+                tracker.edges_changed(changes)
+        return self
+
+    def _set_edges_dense(self, edges):
+        # set_edges for a matrix, reads and writes the whole batch with fancy indexing
+        # ... the last weight given for an edge wins
+        weights = {}
+        for (u, v, w) in edges:
+            weights[(u, v) if u <= v else (v, u)] = w
+        us, vs = (np.array(column) for column in zip(*weights))
+        ws = np.array(list(weights.values()))
+        old = self.adj_matrix[us, vs]
+        self.adj_matrix[us, vs] = ws
+        self.adj_matrix[vs, us] = ws
+        # Read back, so trackers see the weights as stored (e.g. cast to int)
+        new = self.adj_matrix[us, vs]
+        changed = old != new
+        changes = list(zip(us[changed].tolist(), vs[changed].tolist(), old[changed].tolist(), new[changed].tolist()))
+        if len(changes):
+            for tracker in self.trackers:
+                tracker.edges_changed(changes)
         return self
 
 
@@ -141,21 +375,27 @@ class DynamicTimedEnvironment(TimedEnvironment):
 
 class Node():
     id = None
-    packets_processed = 0
-    packets_sent = 0
-    leader = []
-    local_update_counter = 0
     def __init__(self, initial_flock_size):
         # in queue handled by environment
+        self.packets_processed = 0
+        self.packets_sent = 0
+        self.leader = []
+        self.local_update_counter = 0
 
         # Format {target_id: (route_node, route_length, route_broadcast_timestamp)}
-        self.route_t = {}
+        # ... array backed, tracks the longest route incrementally
+        self.route_t = RoutingTable()
         # Format {node_id: (longest_shortest_path_length, timestamp)}
-        self.flock_lsp = {}
+        # ... indexed by length, so the leaders are found without a scan
+        self.flock_lsp = LspTable()
     
     def set_communicator(self,communicator):
         self.com = communicator
 
+    def on_timer(self):
+        # Woken up by a timer set with `com.schedule`
+        pass
+
     def forward(self, packet_meta, route_updated):
         packet = packet_meta.unwrap()
         # If target is None, then broadcast
@@ -181,9 +421,10 @@ class Node():
                     self.send(neighbor, packet)
 
     def refresh_neighbors(self):
+        neighbors = self.com.get_neighbor_ids()
         # Store only ids in set for easier comparison
-        self.neighbor_ids = set(n for n,_ in self.com.get_neighbor_ids())
-        self.neighbor_weights = {n:w for n,w in self.com.get_neighbor_ids()}
+        self.neighbor_ids = set(n for n,_ in neighbors)
+        self.neighbor_weights = {n:w for n,w in neighbors}
     
     def refresh_neighbors_history(self):
         self.last_neighbor_ids = self.neighbor_ids.copy()
@@ -204,23 +445,41 @@ class Node():
         self.refresh_neighbors()
         self.refresh_neighbors_history()
 
-        self.broadcast(Packet(None, self.id, None))
+        self.broadcast(Packet(None, self.id, None, self.com.timestamp()))
 
 
 
 class TimedBroadcastNode(Node):
+    def __init__(self, initial_flock_size, batch_window = None, table_delta = False, table_encoding = "dict"):
+        Node.__init__(self, initial_flock_size)
+        # With a batch window, lsp_update packets for the same neighbor are held
+        # ... for up to `batch_window` (simulated time) and sent as one lsp_batch
+        # ... packet, None sends each one on its own
+        self.batch_window = batch_window
+        # {neighbor_id: {(source_id, target_id): packet}}
+        self.pending_lsp = {}
+        self.flush_scheduled = False
+        # lsp_update packets given to send, batched or not
+        self.lsp_announcements = 0
+        # With table_delta, edges_added packets only carry the routes that
+        # ... improved since what was last sent to that neighbor
+        self.table_delta = table_delta
+        # {neighbor_id: {target_id: (route_length, route_broadcast_timestamp)}}
+        self.table_sent = {}
+        # "dict" sends routing tables as dicts, "packed" as NumPy columns
+        assert(table_encoding in ["dict", "packed"])
+        self.table_encoding = table_encoding
 
     last_shared_lsp = None
     def share_longest_shortest_path(self, direct_edges = None):
-        has_routes_to = [o for o in self.route_t.items() if o[1][0] is not None]
-        if len(list(has_routes_to)) == 0: return
+        if not self.route_t.has_routes(): return
         data = {
             "type": "lsp_update",
-            "value": max(has_routes_to, key=lambda entry: entry[1][1])[1][1]
+            "value": self.route_t.longest_route()
         }
         # Instantiate outside of loop
         # ... so that all have the same timestamp
-        p = Packet(data, self.id, None)
+        p = Packet(data, self.id, None, self.com.timestamp())
         p.local_update_counter = self.local_update_counter
         self.flock_lsp[self.id] = (data["value"],p.created_at)
         if direct_edges is not None:
@@ -229,7 +488,7 @@ class TimedBroadcastNode(Node):
                 indv_packet.target_id = n_id
                 self.send(n_id, indv_packet)
         else:
-            for (t,(neighbor, r_time, r_timestamp)) in list(has_routes_to):
+            for (t,(neighbor, r_time, r_timestamp)) in self.route_t.routes():
                 if neighbor is not None:
                     indv_packet = p.clone()
                     indv_packet.target_id = t
@@ -259,18 +518,61 @@ class TimedBroadcastNode(Node):
 
     def update_leader(self):
         # Recalculate self
-        has_routes_to = [o for o in self.route_t.items() if o[1][0] is not None]
-        if not len(has_routes_to):
-            self.flock_lsp[self.id] = (0, time.time())
+        if not self.route_t.has_routes():
+            self.flock_lsp[self.id] = (0, self.com.timestamp())
         else:
-            self.flock_lsp[self.id] = (max(has_routes_to, key=lambda entry: entry[1][1])[1][1], time.time())
+            self.flock_lsp[self.id] = (self.route_t.longest_route(), self.com.timestamp())
 
-        slsp = min(lsp for (lsp, _) in self.flock_lsp.values())
-        self.leader = [id for id,(lsp,_) in self.flock_lsp.items() if lsp == slsp]
+        # Only rebuild the leader set if the smallest lsps changed
+        if not self.flock_lsp.pop_leaders_dirty(): return
+        leader = self.flock_lsp.leaders()
+        if leader != self.leader:
+            self.leader = leader
+            self.com.leader_changed(leader)
+
+    def send(self, neighbor, packet):
+        is_lsp = packet.data is not None and packet.data["type"] == "lsp_update"
+        if is_lsp: self.lsp_announcements += 1
+        if self.batch_window is None or not is_lsp:
+            return Node.send(self, neighbor, packet)
+        if packet.source_id == self.id:
+            packet.local_update_counter = self.local_update_counter
+        # Only the newest announcement from a source to a target is worth sending
+        pending = self.pending_lsp.setdefault(neighbor, {})
+        key = (packet.source_id, packet.target_id)
+        if key not in pending or pending[key].created_at <= packet.created_at:
+            pending[key] = packet.clone()
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            self.com.schedule(self.batch_window)
+
+    def on_timer(self):
+        # Batch window over, send what is pending
+        self.flush_scheduled = False
+        pending, self.pending_lsp = self.pending_lsp, {}
+        # Links may have gone down during the window
+        linked = set(n for n,_ in self.com.get_neighbor_ids())
+        for neighbor, packets in pending.items():
+            if neighbor not in linked: continue
+            data = {
+                "type": "lsp_batch",
+                "value": list(packets.values())
+            }
+            Node.send(self, neighbor, Packet(data, self.id, neighbor, self.com.timestamp()))
+
+    def process_batch(self, packet_meta):
+        # Process each batched lsp_update as if it arrived on its own
+        batch = packet_meta.unwrap()
+        for packet in batch.data["value"]:
+            packet = packet.clone()
+            packet.inc(batch.t_in_transit)
+            self.process(PacketMeta(packet, packet_meta.from_id, packet_meta.to_id))
 
     def process(self, packet_meta):
         # environment gives packet, instead of agent requesting
         packet = packet_meta.unwrap()
+        if packet.data is not None and packet.data["type"] == "lsp_batch":
+            return self.process_batch(packet_meta)
         route_updated = self.consider_routing_update(packet_meta)
             
         self.handle(packet, packet_meta)
@@ -329,19 +631,64 @@ class TimedBroadcastNode(Node):
         # ... bc recieving other node broadcast 
         self.share_longest_shortest_path(added_edges)
     
+    def encode_routes(self, routes):
+        if self.table_encoding == "packed": return pack_routes(routes)
+        return dict(routes)
+
+    def delta_routes(self, neighbor, routes, t_in_transit):
+        # The routes the neighbor has not been sent with as new a timestamp and as short a length
+        sent = self.table_sent.setdefault(neighbor, {})
+        delta = []
+        for target, (route_node, base_hops, timestamp) in routes:
+            # Receivers skip routes to themselves and cut routes
+            if target == neighbor or route_node is None: continue
+            route_length = base_hops + t_in_transit
+            if target in sent:
+                last_length, last_timestamp = sent[target]
+                if last_timestamp > timestamp or (last_timestamp == timestamp and last_length <= route_length): continue
+            sent[target] = (route_length, timestamp)
+            delta.append((target, (route_node, base_hops, timestamp)))
+        return delta
+
     def broadcast_routing_table(self, added_edges):
-        table = self.route_t.copy()
+        table = self.route_t.to_dict()
         # Add self to table for others
         table[self.id] = (self.id,0,self.local_update_counter)
 
+        if self.table_delta:
+            # One packet per neighbor, with what that neighbor is missing
+            created_at = self.com.timestamp()
+            for n_id in added_edges:
+                routes = self.delta_routes(n_id, table.items(), 0)
+                if not len(routes): continue
+                data = {
+                    "type": "edges_added",
+                    "value": self.encode_routes(routes)
+                }
+                self.send(n_id, Packet(data, self.id, None, created_at))
+            return
+
         # Send to others
         data = {
             "type": "edges_added",
-            "value": table
+            "value": self.encode_routes(table.items())
         }
-        p = Packet(data, self.id, None)
+        p = Packet(data, self.id, None, self.com.timestamp())
         for n_id in added_edges:
             self.send(n_id, p)
+
+    def relay_routing_table(self, packet, packet_meta, routes):
+        # Delta mode relay, only the routes that improved here, as needed by each neighbor
+        for n_id,_ in self.com.get_neighbor_ids():
+            if n_id == packet_meta.from_id: continue
+            delta = self.delta_routes(n_id, routes, packet.t_in_transit)
+            if not len(delta): continue
+            relayed = packet.clone()
+            relayed.data = {
+                "type": "edges_added",
+                "value": self.encode_routes(delta)
+            }
+            self.send(n_id, relayed)
     
     def handle_added_edges_update(self, packet, packet_meta):
         assert(packet.data["type"] == "edges_added")
@@ -349,7 +696,8 @@ class TimedBroadcastNode(Node):
         value = packet.data["value"]
         # Now compare transmitted and self routing table
         added_routes = []
-        for target, (neighbor, base_hops, timestamp) in value.items():
+        improved = []
+        for target, (neighbor, base_hops, timestamp) in route_entries(value):
             # this is needed (see wedge t=3)
             # bc self is not included in routing table
             if target == self.id: continue 
@@ -363,15 +711,19 @@ class TimedBroadcastNode(Node):
                 (self.route_t[target][0] is None) or 
                 self.route_t[target][1] > route_length):
                 added_routes.append(target)
+                improved.append((target, (neighbor, base_hops, timestamp)))
                 self.route_t[target] = (packet_meta.from_id, route_length, timestamp)
         if len(added_routes):
-            self.broadcast(packet, packet_meta)
+            if self.table_delta: self.relay_routing_table(packet, packet_meta, improved)
+            else: self.broadcast(packet, packet_meta)
             self.share_longest_shortest_path()
             self.update_leader()
 
 
     def handle_removed_edges(self, removed_edges):
         if not len(removed_edges): return
+        # Neighbors may drop routes they were sent, send them in full again
+        self.table_sent = {}
         
         # Find any routes that relied on this link
         cut_routes = [(n_id,timestamp + 1) for n_id,(neighbor,path_length,timestamp) in self.route_t.items() if neighbor in removed_edges]
@@ -389,32 +741,34 @@ class TimedBroadcastNode(Node):
             "type": "edges_removed",
             "value": cut_routes
         }
-        p = Packet(data, self.id, None)
+        p = Packet(data, self.id, None, self.com.timestamp())
         self.broadcast(p)
         # Now have both rebroadcast to learn shortest path
         self.local_update_counter += 1
-        self.broadcast(Packet(None, self.id, None))
+        self.broadcast(Packet(None, self.id, None, self.com.timestamp()))
         self.update_leader()
         self.share_longest_shortest_path()
 
     def handle_removed_edges_update(self, packet, packet_meta):
         assert(packet.data["type"] == "edges_removed")
         if (packet.source_id == self.id): return False
+        self.table_sent = {}
         value = packet.data["value"]
         # If used the relay node as beginning of route to removed node, then relay
         res = [(n_id,timestamp) for n_id,timestamp in value if n_id in self.route_t and self.route_t[n_id][0] == packet_meta.from_id]
         assert(packet_meta.from_id is not None)
         if not len(res):
             return False
-        packet.data["value"] = res
-        for n_id,timestamp in packet.data["value"]:
+        # Relay a narrowed copy, the payload is shared with in flight clones
+        packet.data = {"type": packet.data["type"], "value": res}
+        for n_id,timestamp in res:
             if self.route_t[n_id][2]< timestamp:
                 self.route_t[n_id] = (None, 0, self.route_t[n_id][2])
             if n_id in self.flock_lsp and self.flock_lsp[n_id][1] < packet.created_at:
                 del self.flock_lsp[n_id]
         self.broadcast(packet, packet_meta)
         self.local_update_counter += 1
-        self.broadcast(Packet(None, self.id, None))
+        self.broadcast(Packet(None, self.id, None, self.com.timestamp()))
         self.share_longest_shortest_path()
         self.update_leader()
         return True
@@ -424,6 +778,9 @@ class TimedBroadcastNode(Node):
     #     if not len(updated_edges): return
 
     def detect(self):
+        # The environment flags nodes whose links changed
+        # ... otherwise there is nothing to compare
+        if not self.com.neighbors_changed(): return
         self.refresh_neighbors()
 
         # detect if changes 
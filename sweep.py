@@ -0,0 +1,122 @@
+import sys
+import csv
+import time
+import random
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from data.formations import formations
+from data.generators import generators, specified_graph
+from helpers.fiedler import fiedler
+from algorithms.floyd_warshall import floydWarshallCenter
+from algorithms.dynamic_apsp import format_weights
+from structures.simulation_session import run_election
+from helpers.disk_cache import DiskCache
+
+# Static elections over a grid of formations and generated graphs,
+# ... run in a process pool with results written as they complete
+# Every task seeds its own random.Random from the sweep seed and its
+# ... parameters, so a task's graph does not depend on the order,
+# ... the number of workers or the other tasks in the grid
+# e.g. python sweep.py --generators random weighted --sizes 5 10 15 --fiedlers 0.25 0.75 --seeds 1 2 --output sweep.csv
+
+# The worker's DiskCache, made on its first task
+cache = None
+
+columns = ["name", "size", "target_fiedler", "seed", "fiedler", "result", "predicted", "center", "radius", "diameter", "t_steps", "packets_sent", "seconds"]
+
+
+def task_rng(seed, *params):
+    # String seeds are hashed (sha512), stable across runs and machines
+    return random.Random(":".join(str(p) for p in (seed,) + params))
+
+def build_tasks(args):
+    tasks = []
+    # (directory, max bytes), every task carries it to its worker
+    cache_args = (args.cache, int(args.cache_mb * 2**20)) if args.cache else None
+    names = [f["name"] for f in formations] if args.formations == ["all"] else args.formations
+    for formation in formations:
+        if formation["name"] not in names: continue
+        for key in ["full", "tree"]:
+            tasks.append({"name": formation["name"] + " " + key, "formation": formation["name"], "key": key, "cache": cache_args})
+    for generator, size, target_fiedler, seed in itertools.product(args.generators, args.sizes, args.fiedlers, args.seeds):
+        tasks.append({"name": generator, "generator": generator, "size": size, "target_fiedler": target_fiedler, "seed": seed, "ranking": args.ranking, "cache": cache_args})
+    return tasks
+
+def task_graph(task):
+    if "formation" in task:
+        formation = next(f for f in formations if f["name"] == task["formation"])
+        return np.array(formation[task["key"]])
+    rng = task_rng(task["seed"], task["generator"], task["size"], task["target_fiedler"])
+    return specified_graph(task["size"], task["target_fiedler"], generators[task["generator"]], rng, cache_of(task), ranking=task["ranking"])
+
+def cache_of(task):
+    # One DiskCache per worker process, they all share the directory
+    global cache
+    if task["cache"] is None: return None
+    if cache is None: cache = DiskCache(*task["cache"])
+    return cache
+
+def run_task(task):
+    # Top level so that it can be shipped to a process pool
+    start = time.time()
+    graph = task_graph(task)
+    row = {column:task.get(column, "") for column in columns}
+    row["size"] = len(graph)
+    row["fiedler"] = round(float(fiedler(graph)), 6)
+    # Only test connected graphs
+    if row["fiedler"] < 0.01:
+        row["result"] = "DISCONNECTED"
+    else:
+        center, radius, diameter = floydWarshallCenter(format_weights(graph), cache=cache_of(task))
+        leaders, t_steps, packets_sent = run_election(graph)
+        predicted = sorted(leaders[0])
+        row.update({
+            "result": "SUCCESS" if all(leader == set(center) for leader in leaders) else "FAIL",
+            "predicted": predicted,
+            "center": sorted(center),
+            "radius": radius,
+            "diameter": diameter,
+            "t_steps": t_steps,
+            "packets_sent": packets_sent,
+        })
+    row["seconds"] = round(time.time() - start, 3)
+    return row
+
+def sweep(tasks, workers, on_result):
+    # Results are handed to `on_result` in order of completion
+    if workers == 0:
+        for task in tasks:
+            on_result(run_task(task))
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_task, task) for task in tasks]
+        for future in as_completed(futures):
+            on_result(future.result())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--formations", nargs="*", default=[], help="formation names from data/formations.py, or all")
+    parser.add_argument("--generators", nargs="*", default=[], choices=list(generators))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 10, 15, 20, 25])
+    parser.add_argument("--fiedlers", type=float, nargs="+", default=[0.5])
+    parser.add_argument("--seeds", type=int, nargs="+", default=[12])
+    parser.add_argument("--ranking", default="exact", choices=["exact", "perturbation"], help="SpecifySmallStep edge ranking")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU, 0 runs in this process)")
+    parser.add_argument("--output", help="CSV file (default: stdout)")
+    parser.add_argument("--cache", help="directory to cache generated graphs and centers in, shared by the workers")
+    parser.add_argument("--cache-mb", type=float, default=256, help="size bound of the cache, least recently used entries are evicted")
+    args = parser.parse_args()
+
+    tasks = build_tasks(args)
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    writer = csv.DictWriter(output, fieldnames=columns)
+    writer.writeheader()
+    def write(row):
+        writer.writerow(row)
+        output.flush()
+    sweep(tasks, args.workers, write)
+    if args.output: output.close()